@@ -0,0 +1,86 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+
+# Shared response cache. Redis is used (rather than an in-process TTLCache)
+# because entries are invalidated on writes, and a write handled by one
+# gunicorn worker must be visible to all the others. Caching is disabled
+# when REDIS_URL is not set.
+_redis: Optional[Redis] = Redis.from_url(settings.REDIS_URL) if settings.REDIS_URL else None
+
+CACHE_PREFIX = "revo"
+
+
+def address_list_key(user_id: int) -> str:
+    """Cache key for a user's serialized address list."""
+    return f"{CACHE_PREFIX}:addr:{user_id}"
+
+
+def product_list_key(etag: str) -> str:
+    """Cache key for a serialized product list page, keyed by its version ETag."""
+    return f"{CACHE_PREFIX}:products:{etag}"
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Return the cached bytes for key, or None on a miss or Redis error."""
+    if _redis is None:
+        return None
+    try:
+        return await _redis.get(key)
+    except RedisError as e:
+        print(f"Warning: cache read failed for {key}: {e}")
+        return None
+
+
+async def cache_set(key: str, value: bytes, ttl: int) -> None:
+    """Store value under key for ttl seconds; errors are logged and ignored."""
+    if _redis is None:
+        return
+    try:
+        await _redis.set(key, value, ex=ttl)
+    except RedisError as e:
+        print(f"Warning: cache write failed for {key}: {e}")
+
+
+async def cache_delete(key: str) -> None:
+    """Drop key from the cache; errors are logged and ignored."""
+    if _redis is None:
+        return
+    try:
+        await _redis.delete(key)
+    except RedisError as e:
+        print(f"Warning: cache invalidation failed for {key}: {e}")
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag for a serialized response body."""
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def version_etag(*parts: Any) -> str:
+    """Weak ETag derived from data-version markers (row counts, timestamps, query params)."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return 'W/"' + digest + '"'
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    """Return an empty 304 if the client's If-None-Match matches etag, else None."""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+
+def etag_response(request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    """Return body as JSON with validators, or an empty 304 when the client's copy matches."""
+    cached = not_modified(request, etag, cache_control)
+    if cached is not None:
+        return cached
+    return Response(
+        content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": cache_control}
+    )
@@ -1,11 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Annotated
+import asyncio
+import base64
 import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
 import bcrypt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+import jwt
+from jwt.exceptions import (
+    DecodeError,
+    ExpiredSignatureError,
+    InvalidSignatureError,
+    InvalidTokenError as JWTError,
+)
+from sqlalchemy import bindparam
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import select
 
 from app.core.config import settings
@@ -18,33 +38,82 @@ SECRET_KEY: str = settings.JWT_SECRET_KEY
 ALGORITHM: str = settings.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES: int = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-# Use direct bcrypt library instead of passlib to avoid initialization issues
-# We'll handle SHA-256 pre-hashing manually to avoid 72-byte limit
-def _prepare_password_for_bcrypt(password: str) -> bytes:
-    """
-    Prepare password for bcrypt hashing.
-    Always use SHA-256 pre-hashing to avoid bcrypt's 72-byte limit.
-    Returns bytes for bcrypt library.
-    """
-    password_bytes = password.encode('utf-8')
-    # Always hash with SHA-256 first to avoid 72-byte limit
-    # SHA-256 produces 32 bytes (256 bits), well under the 72-byte limit
-    sha256_hash = hashlib.sha256(password_bytes).digest()  # Use digest() not hexdigest() for bytes
-    return sha256_hash
+# Argon2id hasher for new passwords. Hashes record their own parameters, so
+# changing the ARGON2_* settings only affects hashes created (or re-hashed)
+# afterwards; check_needs_rehash() flags the outdated ones on login.
+_ARGON2 = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+ARGON2_PREFIX = "$argon2"
+
+# Keyed HMAC-SHA256 context built once; HS256 verification copies it per token
+# instead of re-deriving the key schedule on every decode.
+_HMAC_TEMPLATE = hmac.new(SECRET_KEY.encode('utf-8'), None, 'sha256') if ALGORITHM == "HS256" else None
+
+# Cache of successful password verifications so repeat logins skip hashing.
+# Keys are HMAC digests of (password, hash), so no plaintext is ever stored.
+# Only successful checks are cached to avoid negative-cache poisoning.
+_VERIFIED_CREDENTIALS: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_VERIFIED_CREDENTIALS_LOCK = threading.Lock()
+
+# Password hashing is CPU-bound; async routes offload it to this pool so it
+# does not block the event loop. argon2-cffi and bcrypt release the GIL while
+# hashing, so the threads run on separate cores. The CPUs are split across the
+# gunicorn workers on the host (each Argon2id hash holds ARGON2_MEMORY_COST KiB),
+# and unlike a process pool there is no child that can die and break the pool.
+_HASH_THREADS = settings.PASSWORD_HASH_THREADS or max(1, (os.cpu_count() or 1) // max(1, settings.WEB_CONCURRENCY))
+_HASH_POOL = ThreadPoolExecutor(max_workers=_HASH_THREADS, thread_name_prefix="password-hash")
+
+# Cache of validated JWTs keyed by sha256(token) -> (payload, user_id), so reused
+# tokens skip signature verification. Expiry is still checked on every hit.
+# For multi-instance deployments this could move to Redis (settings.REDIS_URL).
+_JWT_CACHE: TTLCache = TTLCache(maxsize=50_000, ttl=300)
+_JWT_CACHE_LOCK = threading.Lock()
+
+# Identity cache of user column snapshots keyed by ("id", id) / ("email", exact email),
+# so hot users resolve without a DB round trip. The short TTL bounds staleness
+# of role checks; call invalidate_user_cache() after mutating a user row.
+_USER_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+_USER_CACHE_LOCK = threading.Lock()
+
+# Fixed-window login attempt counters per (client IP, email) -> (window start, count),
+# checked before hashing runs so credential stuffing cannot saturate the workers.
+# Counters are per process, so the effective limit scales with the worker count.
+LOGIN_RATE_LIMIT_PER_MINUTE: int = settings.LOGIN_RATE_LIMIT_PER_MINUTE
+_LOGIN_ATTEMPTS: TTLCache = TTLCache(maxsize=100_000, ttl=60)
+_LOGIN_ATTEMPTS_LOCK = threading.Lock()
+
+# bcrypt hashes from before the Argon2id switch are still verified (with the
+# direct bcrypt library) and get re-hashed on the next successful login.
+# bcrypt only looks at the first 72 bytes of its input, so truncate explicitly
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+# Marker of hashes created by the old SHA-256 pre-hashing scheme.
+# They are still accepted and get re-hashed on the next successful login.
+LEGACY_SHA256_PREFIX = "sha256:"
+
+# Hash verified when a login email is unknown, so misses cost as much CPU as
+# wrong-password attempts and response timing does not reveal which emails
+# exist. Created on first use to keep imports cheap.
+_DUMMY_HASH: Optional[str] = None
+
+
+def _password_bytes(password: str) -> bytes:
+    """Encode a password for bcrypt, truncated to bcrypt's 72-byte limit."""
+    return password.encode('utf-8')[:BCRYPT_MAX_PASSWORD_BYTES]
 
 
 def hash_password(password: str) -> str:
     """
-    Hash a password using bcrypt with SHA-256 pre-hashing.
-    
-    All passwords are first hashed with SHA-256, then the SHA-256 hash is bcrypted.
-    This completely avoids the 72-byte limit of bcrypt while maintaining security.
+    Hash a password using Argon2id.
     
     Args:
         password: Plain text password (must be a string, not bytes)
         
     Returns:
-        Hashed password string (prefixed with "sha256:" to indicate SHA-256 was used)
+        PHC-format Argon2id hash string (e.g. "$argon2id$v=19$m=65536,t=3,p=4$...")
         
     Raises:
         ValueError: If password is None or empty
@@ -57,17 +126,8 @@ def hash_password(password: str) -> str:
         password = str(password)
     
     try:
-        # Prepare password with SHA-256 pre-hashing (always, to avoid any length issues)
-        prepared_password_bytes = _prepare_password_for_bcrypt(password)
-        
-        # Generate salt and hash using bcrypt
-        # bcrypt.gensalt() generates a random salt
-        salt = bcrypt.gensalt()
-        hashed_bytes = bcrypt.hashpw(prepared_password_bytes, salt)
-        
-        # Convert to string and add marker
-        hashed_str = hashed_bytes.decode('utf-8')
-        return "sha256:" + hashed_str
+        # A random salt is generated per hash and embedded in the result
+        return _ARGON2.hash(password)
     except Exception as e:
         # Catch any unexpected errors and provide a clear message
         error_msg = str(e)
@@ -77,12 +137,53 @@ def hash_password(password: str) -> str:
         raise ValueError(f"Password hashing failed: {error_msg}") from e
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Return True if the stored hash is bcrypt/legacy or uses outdated Argon2 parameters."""
+    if not hashed_password.startswith(ARGON2_PREFIX):
+        return True
+    try:
+        return _ARGON2.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return True
+
+
+def log_password_hash_cost() -> None:
+    """Time one Argon2id hash at the configured cost so ops can tune the ARGON2_* settings."""
+    start = time.perf_counter()
+    _ARGON2.hash("argon2-cost-probe")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(
+        f"argon2id cost t={_ARGON2.time_cost} m={_ARGON2.memory_cost}KiB "
+        f"p={_ARGON2.parallelism}: {elapsed_ms:.0f} ms per hash, {_HASH_THREADS} hashing threads"
+    )
+
+
+def _credential_cache_key(plain_password: str, hashed_password: str) -> bytes:
+    """Build the verified-credential cache key without keeping the plaintext."""
+    message = (plain_password + ":" + hashed_password).encode('utf-8')
+    return hmac.new(SECRET_KEY.encode('utf-8'), message, 'sha256').digest()
+
+
+def _is_verified_cached(cache_key: bytes) -> bool:
+    with _VERIFIED_CREDENTIALS_LOCK:
+        return bool(_VERIFIED_CREDENTIALS.get(cache_key))
+
+
+def _remember_verified(cache_key: bytes) -> None:
+    with _VERIFIED_CREDENTIALS_LOCK:
+        _VERIFIED_CREDENTIALS[cache_key] = True
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a password against a hash.
     
-    Supports our custom format with SHA-256 pre-hashing (starts with "sha256:").
-    Also supports legacy bcrypt format (starts with "$2a$", "$2b$", etc.) for backward compatibility.
+    Successful verifications are cached for a short time (keyed by an HMAC of
+    the password and hash), so repeat logins within the TTL skip hashing.
+    
+    Supports Argon2id hashes (starts with "$argon2"), plus bcrypt hashes
+    (starts with "$2a$", "$2b$", etc.) and the legacy SHA-256 pre-hashed format
+    (starts with "sha256:") for backward compatibility.
     
     Args:
         plain_password: Plain text password to verify
@@ -98,36 +199,100 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     if not isinstance(plain_password, str):
         plain_password = str(plain_password)
     
+    cache_key = _credential_cache_key(plain_password, hashed_password)
+    if _is_verified_cached(cache_key):
+        return True
+    
+    result = _verify_password_uncached(plain_password, hashed_password)
+    if result:
+        _remember_verified(cache_key)
+    return result
+
+
+def _verify_password_uncached(plain_password: str, hashed_password: str) -> bool:
+    """Run the actual hash verification (no caching)."""
     try:
-        # Check for our custom SHA-256 marker
-        if hashed_password.startswith("sha256:"):
-            # Remove marker
-            actual_hash = hashed_password[7:]  # Remove "sha256:" prefix
-            
-            # Prepare password with SHA-256 pre-hashing (same as in hash_password)
-            prepared_password_bytes = _prepare_password_for_bcrypt(plain_password)
-            
-            # Verify using bcrypt
-            actual_hash_bytes = actual_hash.encode('utf-8')
-            return bcrypt.checkpw(prepared_password_bytes, actual_hash_bytes)
-        else:
-            # Legacy format: try direct bcrypt verification
-            # This provides backward compatibility for old passwords
-            try:
-                password_bytes = plain_password.encode('utf-8')
-                hashed_bytes = hashed_password.encode('utf-8')
-                return bcrypt.checkpw(password_bytes, hashed_bytes)
-            except Exception:
-                # If direct verification fails, also try with SHA-256 pre-hashing
-                # (in case it's a new password stored without the marker)
-                prepared_password_bytes = _prepare_password_for_bcrypt(plain_password)
-                hashed_bytes = hashed_password.encode('utf-8')
-                return bcrypt.checkpw(prepared_password_bytes, hashed_bytes)
+        if hashed_password.startswith(ARGON2_PREFIX):
+            return _ARGON2.verify(hashed_password, plain_password)
+        if hashed_password.startswith(LEGACY_SHA256_PREFIX):
+            # Legacy format: bcrypt over the SHA-256 digest of the password
+            prepared_password_bytes = hashlib.sha256(plain_password.encode('utf-8')).digest()
+            actual_hash = hashed_password[len(LEGACY_SHA256_PREFIX):]
+            return bcrypt.checkpw(prepared_password_bytes, actual_hash.encode('utf-8'))
+        return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode('utf-8'))
+    except (VerificationError, InvalidHashError):
+        return False
     except Exception:
         # If verification fails for any reason, return False
         return False
 
 
+async def ahash_password(password: str) -> str:
+    """Async variant of hash_password that runs Argon2id in the hashing thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_HASH_POOL, hash_password, password)
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Async variant of verify_password that runs hashing in the hashing thread pool.
+    
+    The verified-credential cache is checked and updated here, on the event
+    loop; only the hashing work itself is sent to the pool.
+    """
+    if not plain_password or not hashed_password:
+        return False
+    
+    if not isinstance(plain_password, str):
+        plain_password = str(plain_password)
+    
+    cache_key = _credential_cache_key(plain_password, hashed_password)
+    if _is_verified_cached(cache_key):
+        return True
+    
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        _HASH_POOL, _verify_password_uncached, plain_password, hashed_password
+    )
+    if result:
+        _remember_verified(cache_key)
+    return result
+
+
+async def averify_dummy_password(plain_password: str) -> None:
+    """Run one verification against a throwaway hash for a login with an unknown email."""
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = await ahash_password(secrets.token_urlsafe(32))
+    # The dummy never matches, so nothing lands in the verified-credential cache
+    await averify_password(plain_password or "x", _DUMMY_HASH)
+
+
+def check_login_rate_limit(client_ip: str, email: str) -> None:
+    """
+    Count a login attempt and reject it once the per-minute limit is exceeded.
+    
+    Raises:
+        HTTPException: 429 with a Retry-After header when over the limit
+    """
+    key = (client_ip, email.lower())
+    now = time.monotonic()
+    with _LOGIN_ATTEMPTS_LOCK:
+        window_start, count = _LOGIN_ATTEMPTS.get(key, (now, 0))
+        if now - window_start >= 60:
+            window_start, count = now, 0
+        count += 1
+        _LOGIN_ATTEMPTS[key] = (window_start, count)
+    
+    if count > LOGIN_RATE_LIMIT_PER_MINUTE:
+        retry_after = max(1, int(60 - (now - window_start)))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     # Use datetime.now(timezone.utc) instead of deprecated datetime.utcnow()
@@ -136,37 +301,144 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify and decode an access token.
+    
+    HS256 tokens are verified against the precomputed HMAC template; other
+    algorithms go through PyJWT.
+    
+    Raises:
+        JWTError: If the token is malformed, has a bad signature or has expired
+    """
+    if _HMAC_TEMPLATE is None:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = orjson.loads(_b64url_decode(header_b64))
+        signature = _b64url_decode(signature_b64)
+        signing_input = f"{header_b64}.{payload_b64}".encode('ascii')
+    except ValueError as e:
+        raise DecodeError("Invalid token") from e
+
+    if not isinstance(header, dict) or header.get("alg") != "HS256":
+        raise DecodeError("Unsupported token algorithm")
+
+    mac = _HMAC_TEMPLATE.copy()
+    mac.update(signing_input)
+    if not hmac.compare_digest(mac.digest(), signature):
+        raise InvalidSignatureError("Signature verification failed")
+
+    try:
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except ValueError as e:
+        raise DecodeError("Invalid token payload") from e
+    if not isinstance(payload, dict):
+        raise DecodeError("Invalid token payload")
+
+    exp = payload.get("exp")
+    if exp is not None:
+        if not isinstance(exp, (int, float)):
+            raise DecodeError("Expiration Time claim (exp) must be a number")
+        if exp <= datetime.now(timezone.utc).timestamp():
+            raise ExpiredSignatureError("Signature has expired")
+    return payload
+
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
+def _credentials_exception() -> HTTPException:
+    """A fresh 401 per raise, so no traceback or context is shared between requests."""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _cache_user(user: User) -> None:
+    snapshot = user.model_dump()
+    with _USER_CACHE_LOCK:
+        _USER_CACHE[("id", user.id)] = snapshot
+        _USER_CACHE[("email", user.email)] = snapshot
+
+
+def invalidate_user_cache(user: User) -> None:
+    """Drop a user from the identity cache after their row has changed."""
+    with _USER_CACHE_LOCK:
+        _USER_CACHE.pop(("id", user.id), None)
+        _USER_CACHE.pop(("email", user.email), None)
+
+
+# Built once; exact match, like register and login (users.email is unique
+# case-sensitively, so a case-insensitive match could pick another account)
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+
+async def _load_user(session, email: Optional[str] = None, user_id: Optional[int] = None) -> Optional[User]:
+    """Resolve a user by id or (exact) email, using the identity cache when possible."""
+    cache_key = ("id", user_id) if user_id else ("email", email)
+    with _USER_CACHE_LOCK:
+        snapshot = _USER_CACHE.get(cache_key)
+    if snapshot is not None:
+        # Rebuild a per-request instance and attach it without a SELECT
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+    if user_id:
+        # Primary-key lookup goes through the identity map first
+        user = await session.get(User, user_id)
+    else:
+        user = (await session.exec(_USER_BY_EMAIL, params={"email": email})).first()
+    if user:
+        _cache_user(user)
+    return user
+
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     session=Depends(get_session),
 ) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    # Fast path: token was already validated recently
+    token_key = hashlib.sha256(token.encode('utf-8')).digest()
+    with _JWT_CACHE_LOCK:
+        cached = _JWT_CACHE.get(token_key)
+    if cached is not None:
+        payload, cached_user_id = cached
+        exp = payload.get("exp")
+        if exp is not None and exp <= datetime.now(timezone.utc).timestamp():
+            with _JWT_CACHE_LOCK:
+                _JWT_CACHE.pop(token_key, None)
+            raise _credentials_exception()
+        user = await _load_user(session, user_id=cached_user_id)
+        if not user:
+            raise _credentials_exception()
+        return user
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        # Prefer email; fallback to id if present
+        payload = decode_access_token(token)
+        # Resolve by the immutable id claim; email is only a fallback for
+        # tokens issued without one
         email: Optional[str] = payload.get("email") or payload.get("sub")
         user_id: Optional[int] = payload.get("id")
         if not email and not user_id:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
 
-    if email:
-        stmt = select(User).where(User.email == email)
-    else:
-        stmt = select(User).where(User.id == user_id)
-
-    user = session.exec(stmt).first()
+    user = await _load_user(session, email=email, user_id=user_id)
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    # Only successful validations are cached
+    with _JWT_CACHE_LOCK:
+        _JWT_CACHE[token_key] = (payload, user.id)
     return user
 
 
@@ -1,5 +1,8 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel, create_engine
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
 import os
 
@@ -7,23 +10,63 @@ import os
 # Get PostgreSQL connection URL from environment variable or settings
 database_url = os.getenv("DATABASE_URL", settings.DATABASE_URL)
 
-# Replace postgresql:// with postgresql+psycopg2:// for SQLAlchemy compatibility
+# Replace postgresql:// with postgresql+psycopg:// to use the psycopg 3 driver
 # Render and other platforms often provide postgresql:// URLs
 if database_url.startswith("postgresql://"):
-    database_url = database_url.replace("postgresql://", "postgresql+psycopg2://", 1)
+    database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
 
-# Create PostgreSQL engine
-engine = create_engine(
+# Connection options shared by the sync and async engines
+_engine_options = dict(
+    echo=settings.DB_ECHO,  # SQL logging is off unless explicitly enabled
+    query_cache_size=1200,  # Compiled-SQL cache entries (default 500) so hot statements stay compiled
+    # TCP keepalives let the kernel detect dead peers, instead of a pre-ping
+    # SELECT 1 round trip on every connection checkout
+    connect_args={
+        "keepalives": 1,
+        "keepalives_idle": 30,
+        "keepalives_interval": 10,
+        "keepalives_count": 3,
+    },
+)
+
+# PgBouncer in transaction pooling mode may hand each transaction a different
+# server connection, so psycopg's server-side prepared statements must be off
+if settings.DB_PGBOUNCER:
+    _engine_options["connect_args"]["prepare_threshold"] = None
+
+# Sync PostgreSQL engine (table creation at startup and scripts such as seed_data.py).
+# It is used only briefly, so it opens a connection per use instead of holding
+# a pool of idle connections in every worker.
+engine = create_engine(database_url, poolclass=NullPool, **_engine_options)
+
+# Async PostgreSQL engine used by the API request handlers.
+# psycopg 3 provides the async driver, so no separate asyncpg dependency is needed.
+async_engine = create_async_engine(
     database_url,
-    echo=True,  # Set to False in production for better performance
-    pool_pre_ping=True,  # Verify connections before using them (helps with connection recovery)
-    pool_size=5,  # Number of connections to maintain in the pool
-    max_overflow=10  # Maximum number of connections to create beyond pool_size
+    pool_size=settings.DB_POOL_SIZE,  # Number of connections to maintain in the pool
+    max_overflow=settings.DB_MAX_OVERFLOW,  # Maximum number of connections to create beyond pool_size
+    pool_timeout=settings.DB_POOL_TIMEOUT,  # Seconds to wait for a connection when the pool is exhausted
+    pool_recycle=1800,  # Replace connections older than 30 minutes
+    pool_use_lifo=True,  # Reuse the most recently returned connection so idle ones can age out
+    **_engine_options,
 )
 
+# Session factory built once; expire_on_commit=False keeps loaded attributes
+# usable after commit, since implicit lazy loads are not possible with an AsyncSession
+async_session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+# Arbitrary application-wide key for the schema creation advisory lock
+_SCHEMA_LOCK_KEY = 0x7265766F  # ASCII "revo"
+
 
 def create_db_and_tables():
-    """Create all database tables based on the models."""
+    """Create all database tables based on the models.
+    
+    Runs under a transaction-scoped advisory lock so that when several workers
+    start at once only one of them issues DDL; the others wait and then find
+    the tables already present.
+    """
     try:
         # Import all models here to ensure they are registered
         from app.db.models import (
@@ -32,7 +75,9 @@ def create_db_and_tables():
         )
         
         # Create all tables (if not exists)
-        SQLModel.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _SCHEMA_LOCK_KEY})
+            SQLModel.metadata.create_all(conn)
         print("Database and tables created successfully!")
     except Exception as e:
         print(f"Error creating database tables: {e}")
@@ -46,8 +91,12 @@ def init_db():
     create_db_and_tables()
 
 
-def get_session():
-    """FastAPI dependency that yields a SQLModel Session bound to our engine."""
-    with Session(engine) as session:
+async def get_session():
+    """FastAPI dependency that yields a SQLModel AsyncSession bound to the async engine.
+    
+    FastAPI caches dependencies per request, so helpers that also depend on
+    get_session share this session (and its one pooled connection).
+    """
+    async with async_session_factory() as session:
         yield session
 
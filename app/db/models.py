@@ -1,7 +1,8 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, Dict, List, Any
 from datetime import datetime
-from sqlalchemy import Column, JSON, TIMESTAMP
+from sqlalchemy import Column, Float, Index, TIMESTAMP, literal_column, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 
 
@@ -41,9 +42,11 @@ class User(SQLModel, table=True):
 # Addresses
 class Address(SQLModel, table=True):
     __tablename__ = "addresses"
+    # Fetch created_at/updated_at in the INSERT/UPDATE ... RETURNING of the flush
+    __mapper_args__ = {"eager_defaults": True}
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id")
+    user_id: int = Field(foreign_key="users.id", index=True)
     full_name: str = Field(..., description="Recipient full name")
     phone_number: str = Field(..., description="Contact phone number")
     address_line1: str = Field(..., description="Street address / Building")
@@ -64,9 +67,32 @@ class Address(SQLModel, table=True):
     user: "User" = Relationship(back_populates="addresses")
 
 
+# Matches the list_addresses ordering (default first, then newest)
+Index(
+    "ix_addresses_user_default_created",
+    Address.user_id,
+    Address.is_default.desc(),
+    Address.created_at.desc().nulls_last(),
+)
+
+
 # Products
 class Product(SQLModel, table=True):
     __tablename__ = "products"
+    # Fetch server-generated timestamps in the INSERT/UPDATE ... RETURNING of the flush
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_products_brand_cat", "brand_id", "category_id"),
+        # Category filter alone or combined with the condition filter
+        Index("ix_products_category_condition", "category_id", "condition"),
+        # Price range filters on PRODUCT_PRICE (the expression must stay identical)
+        Index(
+            "ix_products_price",
+            text("coalesce(nullif(resale_price, 0), nullif(list_price, 0), nullif(base_price, 0), 0)"),
+        ),
+        # Containment lookups for the city filter (city_availability_json @> '["Vancouver"]')
+        Index("ix_products_city_gin", "city_availability_json", postgresql_using="gin"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     sku: str = Field(sa_column_kwargs={"unique": True})
@@ -77,8 +103,8 @@ class Product(SQLModel, table=True):
     condition: Optional[str] = Field(default=None)  # CHECK: A, B, C
     verified: int = Field(default=0)
     description: Optional[str] = Field(default=None)
-    images_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))
-    cost_components_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    images_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSONB))
+    cost_components_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
     base_price: Optional[float] = Field(default=None)
     list_price: Optional[float] = Field(default=None)
     resale_price: Optional[float] = Field(default=None)
@@ -86,8 +112,8 @@ class Product(SQLModel, table=True):
     rating: Optional[float] = Field(default=None)  # Product rating (e.g., 4.8)
     reviews: Optional[int] = Field(default=0)  # Number of reviews
     location: Optional[str] = Field(default=None)  # Location (e.g., "Vancouver Hub", "Ottawa Lab")
-    highlights_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))  # JSON array of highlights
-    city_availability_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))  # JSON array of available cities
+    highlights_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSONB))  # JSON array of highlights
+    city_availability_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSONB))  # JSON array of available cities
     created_at: datetime | None = Field(
         default=None, sa_column=Column(TIMESTAMP(timezone=True), server_default=func.now())
     )
@@ -96,6 +122,18 @@ class Product(SQLModel, table=True):
     )
 
 
+# Effective selling price used by the product price filters: the first non-zero
+# of resale_price, list_price and base_price (0 if none is set). The zeros are
+# inlined rather than bound so queries match ix_products_price.
+PRODUCT_PRICE = func.coalesce(
+    func.nullif(Product.resale_price, literal_column("0")),
+    func.nullif(Product.list_price, literal_column("0")),
+    func.nullif(Product.base_price, literal_column("0")),
+    literal_column("0"),
+    type_=Float,
+)
+
+
 # Carts
 class Cart(SQLModel, table=True):
     __tablename__ = "carts"
@@ -111,7 +149,7 @@ class CartItem(SQLModel, table=True):
     __tablename__ = "cart_items"
     
     cart_id: int = Field(foreign_key="carts.id", primary_key=True)
-    product_id: int = Field(foreign_key="products.id", primary_key=True)
+    product_id: int = Field(foreign_key="products.id", primary_key=True, index=True)
     qty: int
 
 
@@ -121,24 +159,41 @@ class Order(SQLModel, table=True):
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id")
-    status: str = Field(default="pending")  # CHECK: pending, paid, shipped, completed, refunded
+    status: str = Field(default="pending")  # CHECK: pending, paid, shipped, completed, refunded, cancelled (PaymentIntent creation failed)
     subtotal: float
     tax: float
     shipping_fee: float = Field(default=0)
     total: float
     notes: Optional[str] = Field(default=None)
-    shipping_address_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))  # JSON snapshot of shipping address
+    shipping_address_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))  # JSON snapshot of shipping address
     created_at: datetime | None = Field(
-        default=None, sa_column=Column(TIMESTAMP(timezone=True), server_default=func.now())
+        default=None, sa_column=Column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
     )
 
 
+# Match the get_my_orders ordering (newest first), with and without the status filter
+Index(
+    "ix_orders_user_created",
+    Order.user_id,
+    Order.created_at.desc().nulls_last(),
+    Order.id.desc(),
+)
+Index(
+    "ix_orders_user_status_created",
+    Order.user_id,
+    Order.status,
+    Order.created_at.desc().nulls_last(),
+    Order.id.desc(),
+)
+
+
 class OrderItem(SQLModel, table=True):
     __tablename__ = "order_items"
     
     order_id: int = Field(foreign_key="orders.id", primary_key=True)
-    product_id: int = Field(foreign_key="products.id", primary_key=True)
+    product_id: int = Field(foreign_key="products.id", primary_key=True, index=True)
     title_snapshot: str
+    image_snapshot: Optional[str] = None  # first product image at order time
     unit_price: float
     qty: int
     line_total: float
@@ -149,8 +204,8 @@ class Payment(SQLModel, table=True):
     __tablename__ = "payments"
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    order_id: int = Field(foreign_key="orders.id")
-    stripe_pi: str
+    order_id: int = Field(foreign_key="orders.id", index=True)
+    stripe_pi: str = Field(sa_column_kwargs={"unique": True})  # PaymentIntent ids are globally unique
     amount: float
     currency: str
     status: str
@@ -164,15 +219,17 @@ class PickupRequest(SQLModel, table=True):
     __tablename__ = "pickup_requests"
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id")
-    brand_id: Optional[int] = Field(default=None, foreign_key="brands.id")
+    user_id: int = Field(foreign_key="users.id", index=True)
+    brand_id: Optional[int] = Field(default=None, foreign_key="brands.id", index=True)
     model_text: Optional[str] = Field(default=None)
     storage: Optional[str] = Field(default=None)  # Storage capacity (e.g., "128GB", "256GB", "512GB")
     condition: Optional[str] = Field(default=None)
     additional_info: Optional[str] = Field(default=None)  # Additional information/notes
-    photos_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))  # JSON array of photo URLs
-    address_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    photos_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSONB))  # JSON array of photo URLs
+    address_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
+    created_at: datetime | None = Field(
+        default=None, sa_column=Column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
+    )
     scheduled_at: datetime | None = Field(
         default=None, sa_column=Column(TIMESTAMP(timezone=True))
     )
@@ -186,10 +243,10 @@ class Evaluation(SQLModel, table=True):
     __tablename__ = "evaluations"
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    pickup_id: int = Field(foreign_key="pickup_requests.id")
-    tester_id: Optional[int] = Field(default=None, foreign_key="users.id")
-    diagnostics_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
-    parts_replaced_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))
+    pickup_id: int = Field(foreign_key="pickup_requests.id", index=True)
+    tester_id: Optional[int] = Field(default=None, foreign_key="users.id", index=True)
+    diagnostics_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
+    parts_replaced_json: Optional[List[str]] = Field(default=None, sa_column=Column(JSONB))
     evaluation_cost: Optional[float] = Field(default=None)
     final_offer: Optional[float] = Field(default=None)
     notes: Optional[str] = Field(default=None)
@@ -203,12 +260,12 @@ class AuditLog(SQLModel, table=True):
     __tablename__ = "audit_logs"
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: Optional[int] = Field(default=None, foreign_key="users.id")
+    user_id: Optional[int] = Field(default=None, foreign_key="users.id", index=True)
     action: str
     entity: str
     entity_id: Optional[int] = Field(default=None)
-    payload_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    payload_json: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
     created_at: datetime | None = Field(
-        default=None, sa_column=Column(TIMESTAMP(timezone=True), server_default=func.now())
+        default=None, sa_column=Column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
     )
 
@@ -1,25 +1,47 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
-from app.db.database import create_db_and_tables
+from app.core.security import log_password_hash_cost
+from app.db.database import async_session_factory, create_db_and_tables
 from app.routers import auth, products, cart, orders, tradein, internal, categories, users, locations, address, admin
 
-# Initialize database
-try:
-    create_db_and_tables()
-except Exception as e:
-    print(f"Warning: Database initialization failed: {e}")
-    print("Tables may need to be created manually. The application will continue to start.")
-    # Don't raise - allow the app to start even if table creation fails
-    # Tables will be created on first use or can be created manually
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup work after the server is up instead of at import time."""
+    # Initialize database
+    try:
+        await run_in_threadpool(create_db_and_tables)
+    except Exception as e:
+        print(f"Warning: Database initialization failed: {e}")
+        print("Tables may need to be created manually. The application will continue to start.")
+        # Don't raise - allow the app to start even if table creation fails
+        # Tables will be created on first use or can be created manually
+    
+    # Report the measured hash cost so the ARGON2_* settings can be tuned per deployment
+    await run_in_threadpool(log_password_hash_cost)
+    
+    # Warm the category list so the first request does not pay for it
+    try:
+        async with async_session_factory() as session:
+            await categories.refresh_categories_cache(session)
+    except Exception as e:
+        print(f"Warning: Category cache warm-up failed: {e}")
+    yield
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Revo Backend API",
     description="Backend API for Revo C2B2C Electronics Trade-in Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # Encode JSON responses with orjson
 )
 
 # Configure CORS
@@ -29,8 +51,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Next-page signals: admin listing cursor and product list offset
+    expose_headers=["X-Next-Cursor", "X-Next-Offset"],
 )
 
+# Compress JSON and other text responses over 500 bytes.
+# Level 6 keeps most of the size reduction of level 9 at a fraction of the CPU.
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=6)
+
 # Health check endpoint
 @app.get("/")
 async def root():
@@ -45,13 +73,16 @@ async def api_health_check():
     """Compatible health check endpoint at /api/health for frontend."""
     return {"status": "healthy"}
 
-# Serve uploaded files
-if os.path.exists("uploads"):
-    app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
-# Serve static images for testing
-if os.path.exists("static/images"):
-    app.mount("/static/images", StaticFiles(directory="static/images"), name="static_images")
+# Media is best served by nginx (sendfile) or a CDN; these mounts are the
+# fallback for local development and single-process deployments
+if settings.SERVE_MEDIA_FILES:
+    # Serve uploaded files
+    if os.path.exists("uploads"):
+        app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+    
+    # Serve static images for testing
+    if os.path.exists("static/images"):
+        app.mount("/static/images", StaticFiles(directory="static/images"), name="static_images")
 
 # Prevent noisy 404s for favicon
 @app.get("/favicon.ico", include_in_schema=False)
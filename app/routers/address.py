@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import select, Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import bindparam
+from sqlmodel import select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 
+from app.core.cache import address_list_key, cache_delete, cache_get, cache_set
+from app.core.config import settings
 from app.core.security import get_current_user
 from app.db.database import get_session
 from app.db.models import Address, User
@@ -10,35 +15,49 @@ from app.schemas.address import AddressCreate, AddressUpdate, AddressRead
 
 router = APIRouter(prefix="/api/addresses", tags=["Addresses"])
 
+# Built once and reused with a bound user_id:
+# default address first, then by creation date (newest first)
+_ADDRESSES_FOR_USER = (
+    select(Address)
+    .where(Address.user_id == bindparam("user_id"))
+    .order_by(Address.is_default.desc(), Address.created_at.desc().nulls_last())
+)
+
+# Serializes address lists exactly as the List[AddressRead] response model would
+_ADDRESS_LIST_ADAPTER = TypeAdapter(List[AddressRead])
+
 
 @router.get("/", response_model=List[AddressRead])
-def list_addresses(
+async def list_addresses(
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Get all addresses for the current user.
     
     Returns a list of all addresses belonging to the authenticated user,
     ordered by default address first, then by creation date.
+    The serialized list is cached per user until the next address write.
     """
+    cache_key = address_list_key(current_user.id)
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
     # Query all addresses for the current user
-    statement = select(Address).where(Address.user_id == current_user.id)
-    addresses = session.exec(statement).all()
+    addresses = (await session.exec(_ADDRESSES_FOR_USER, params={"user_id": current_user.id})).all()
     
-    # Sort: default address first, then by creation date (newest first)
-    addresses = sorted(
-        addresses,
-        key=lambda a: (not a.is_default, -(a.created_at.timestamp() if a.created_at else 0)),
+    body = _ADDRESS_LIST_ADAPTER.dump_json(
+        _ADDRESS_LIST_ADAPTER.validate_python(addresses, from_attributes=True)
     )
-    
-    return addresses
+    await cache_set(cache_key, body, settings.ADDRESS_CACHE_TTL)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/", response_model=AddressRead, status_code=status.HTTP_201_CREATED)
-def create_address(
+async def create_address(
     address_in: AddressCreate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Create a new address for the current user.
     
@@ -46,18 +65,21 @@ def create_address(
     the user's first address, all other addresses will be set to is_default=False.
     """
     # Check if this is the user's first address
-    existing_addresses = session.exec(
-        select(Address).where(Address.user_id == current_user.id)
-    ).all()
+    existing_address_id = (await session.exec(
+        select(Address.id).where(Address.user_id == current_user.id).limit(1)
+    )).first()
     
-    is_first_address = len(existing_addresses) == 0
+    is_first_address = existing_address_id is None
     
     # If setting as default or this is the first address, unset other defaults
     if address_in.is_default or is_first_address:
-        # Set all other addresses to is_default=False
-        for addr in existing_addresses:
-            addr.is_default = False
-            session.add(addr)
+        # Set all other addresses to is_default=False in a single UPDATE
+        if not is_first_address:
+            await session.exec(
+                update(Address)
+                .where(Address.user_id == current_user.id, Address.is_default == True)
+                .values(is_default=False)
+            )
         
         # If this is the first address, automatically set it as default
         is_default = True if is_first_address else address_in.is_default
@@ -79,18 +101,18 @@ def create_address(
     )
     
     session.add(address)
-    session.commit()
-    session.refresh(address)
+    await session.commit()
+    await cache_delete(address_list_key(current_user.id))
     
     return address
 
 
 @router.put("/{address_id}", response_model=AddressRead)
-def update_address(
+async def update_address(
     address_id: int,
     address_in: AddressUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Update an existing address.
     
@@ -98,7 +120,7 @@ def update_address(
     If updating to set as default address, all other addresses will be set to is_default=False.
     """
     # Find the address
-    address = session.get(Address, address_id)
+    address = await session.get(Address, address_id)
     if not address:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -117,40 +139,39 @@ def update_address(
     
     # If setting as default, unset other defaults
     if update_data.get("is_default") is True:
-        existing_addresses = session.exec(
-            select(Address).where(
+        await session.exec(
+            update(Address)
+            .where(
                 Address.user_id == current_user.id,
-                Address.id != address_id
+                Address.id != address_id,
+                Address.is_default == True,
             )
-        ).all()
-        
-        for addr in existing_addresses:
-            addr.is_default = False
-            session.add(addr)
+            .values(is_default=False)
+        )
     
     # Update address fields
     for field, value in update_data.items():
         setattr(address, field, value)
     
     session.add(address)
-    session.commit()
-    session.refresh(address)
+    await session.commit()
+    await cache_delete(address_list_key(current_user.id))
     
     return address
 
 
 @router.delete("/{address_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_address(
+async def delete_address(
     address_id: int,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Delete an address.
     
     Only the address owner can delete their own address.
     """
     # Find the address
-    address = session.get(Address, address_id)
+    address = await session.get(Address, address_id)
     if not address:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -165,8 +186,9 @@ def delete_address(
         )
     
     # Delete the address
-    session.delete(address)
-    session.commit()
+    await session.delete(address)
+    await session.commit()
+    await cache_delete(address_list_key(current_user.id))
     
     return None
 
@@ -1,8 +1,9 @@
 from typing import Optional, Dict, List, Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
-from sqlmodel import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.orm import defer
+from sqlmodel import delete, select
 
 from app.core.security import get_current_admin
 from app.db.database import get_session
@@ -14,10 +15,25 @@ from app.db.models import (
     PickupRequest,
     User,
 )
+from app.schemas.admin import AdminOrderRow, AdminTradeinRow
 
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
+_ORDER_ROWS = TypeAdapter(List[AdminOrderRow])
+_TRADEIN_ROWS = TypeAdapter(List[AdminTradeinRow])
+
+# Admin listings are keyset-paginated on id (newest first). When a page is full,
+# the id to pass as ?cursor= for the next page is returned in this header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _page_response(body: bytes, last_id: Optional[int], full_page: bool) -> Response:
+    headers = {NEXT_CURSOR_HEADER: str(last_id)} if full_page and last_id is not None else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 class OrderUpdatePayload(BaseModel):
     status: Optional[str] = None
@@ -35,46 +51,36 @@ class TradeinEvaluationPayload(BaseModel):
 
 # Sales Orders Management
 
-@router.get("/orders", include_in_schema=False)
-def list_orders(
+@router.get("/orders", response_model=List[AdminOrderRow], include_in_schema=False)
+async def list_orders(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="Only return orders with an id below this value"),
     admin: User = Depends(get_current_admin),
     session=Depends(get_session),
 ):
     """
-    Get all orders with customer basic info (joined with users).
+    Get orders with customer basic info (joined with users), newest first.
     """
-    stmt = select(Order, User).join(User, User.id == Order.user_id)
-    rows = session.exec(stmt).all()
-
-    results = []
-    for order, user in rows:
-        results.append(
-            {
-                "order": {
-                    "id": order.id,
-                    "user_id": order.user_id,
-                    "status": order.status,
-                    "subtotal": order.subtotal,
-                    "tax": order.tax,
-                    "shipping_fee": order.shipping_fee,
-                    "total": order.total,
-                    "notes": order.notes,
-                    "shipping_address_json": order.shipping_address_json,
-                    "created_at": order.created_at,
-                },
-                "user": {
-                    "id": user.id,
-                    "email": user.email,
-                    "full_name": user.full_name,
-                },
-            }
-        )
+    stmt = (
+        select(Order, User)
+        .join(User, User.id == Order.user_id)
+        .order_by(Order.id.desc())
+        .limit(limit)
+    )
+    if cursor is not None:
+        stmt = stmt.where(Order.id < cursor)
+    rows = (await session.exec(stmt)).all()
 
-    return results
+    # pydantic-core reads the ORM attributes and encodes the JSON in one pass
+    page = _ORDER_ROWS.validate_python(
+        [{"order": order, "user": user} for order, user in rows], from_attributes=True
+    )
+    last_id = rows[-1][0].id if rows else None
+    return _page_response(_ORDER_ROWS.dump_json(page), last_id, len(rows) == limit)
 
 
 @router.put("/orders/{order_id}", include_in_schema=False)
-def update_order(
+async def update_order(
     order_id: int,
     payload: OrderUpdatePayload,
     admin: User = Depends(get_current_admin),
@@ -83,7 +89,7 @@ def update_order(
     """
     Update order status and notes.
     """
-    order = session.get(Order, order_id)
+    order = await session.get(Order, order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
@@ -95,13 +101,12 @@ def update_order(
         order.notes = payload.notes
 
     session.add(order)
-    session.commit()
-    session.refresh(order)
+    await session.commit()
     return order
 
 
 @router.delete("/orders/{order_id}", status_code=status.HTTP_204_NO_CONTENT, include_in_schema=False)
-def delete_order(
+async def delete_order(
     order_id: int,
     admin: User = Depends(get_current_admin),
     session=Depends(get_session),
@@ -109,92 +114,60 @@ def delete_order(
     """
     Delete an order (and its dependent items/payments to avoid FK issues).
     """
-    order = session.get(Order, order_id)
-    if not order:
+    # Delete order items and payments explicitly (if any), one statement per table
+    await session.exec(delete(OrderItem).where(OrderItem.order_id == order_id))
+    await session.exec(delete(Payment).where(Payment.order_id == order_id))
+
+    result = await session.exec(delete(Order).where(Order.id == order_id))
+    if result.rowcount == 0:
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
         )
 
-    # Delete order items and payments explicitly (if any)
-    order_items = session.exec(
-        select(OrderItem).where(OrderItem.order_id == order_id)
-    ).all()
-    for item in order_items:
-        session.delete(item)
-
-    payments = session.exec(
-        select(Payment).where(Payment.order_id == order_id)
-    ).all()
-    for payment in payments:
-        session.delete(payment)
-
-    session.delete(order)
-    session.commit()
+    await session.commit()
     return None
 
 
 # Trade-in Orders Management
 
-@router.get("/tradeins")
-def list_tradeins(
+@router.get("/tradeins", response_model=List[AdminTradeinRow])
+async def list_tradeins(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="Only return pickups with an id below this value"),
     admin: User = Depends(get_current_admin),
     session=Depends(get_session),
 ):
     """
-    List all pickup requests with optional evaluation info and user info
+    List pickup requests, newest first, with optional evaluation info and user info
     (LEFT OUTER JOIN on evaluations and users).
     """
     stmt = (
         select(PickupRequest, Evaluation, User)
         .join(User, User.id == PickupRequest.user_id)
         .join(Evaluation, Evaluation.pickup_id == PickupRequest.id, isouter=True)
+        # Evaluation details are not part of this listing
+        .options(defer(Evaluation.diagnostics_json), defer(Evaluation.parts_replaced_json))
+        .order_by(PickupRequest.id.desc())
+        .limit(limit)
     )
-    rows = session.exec(stmt).all()
-
-    results = []
-    for pickup, evaluation, user in rows:
-        results.append(
-            {
-                "pickup": {
-                    "id": pickup.id,
-                    "user_id": pickup.user_id,
-                    "brand_id": pickup.brand_id,
-                    "model_text": pickup.model_text,
-                    "storage": pickup.storage,
-                    "condition": pickup.condition,
-                    "additional_info": pickup.additional_info,
-                    "photos": pickup.photos_json or [],
-                    "address_json": pickup.address_json,
-                    "created_at": pickup.created_at,
-                    "scheduled_at": pickup.scheduled_at,
-                    "deposit_amount": pickup.deposit_amount,
-                    "status": pickup.status,
-                    "notes": pickup.notes,
-                    "estimated_price": pickup.estimated_price,
-                },
-                "user": {
-                    "id": user.id,
-                    "email": user.email,
-                    "full_name": user.full_name,
-                },
-                "evaluation": {
-                    "id": evaluation.id,
-                    "pickup_id": evaluation.pickup_id,
-                    "tester_id": evaluation.tester_id,
-                    "final_offer": evaluation.final_offer,
-                    "notes": evaluation.notes,
-                    "created_at": evaluation.created_at,
-                }
-                if evaluation
-                else None,
-            }
-        )
-
-    return results
+    if cursor is not None:
+        stmt = stmt.where(PickupRequest.id < cursor)
+    rows = (await session.exec(stmt)).all()
+
+    page = _TRADEIN_ROWS.validate_python(
+        [
+            {"pickup": pickup, "user": user, "evaluation": evaluation}
+            for pickup, evaluation, user in rows
+        ],
+        from_attributes=True,
+    )
+    last_id = rows[-1][0].id if rows else None
+    return _page_response(_TRADEIN_ROWS.dump_json(page), last_id, len(rows) == limit)
 
 
 @router.put("/tradeins/{pickup_id}/evaluate")
-def evaluate_tradein(
+async def evaluate_tradein(
     pickup_id: int,
     payload: TradeinEvaluationPayload,
     admin: User = Depends(get_current_admin),
@@ -203,16 +176,16 @@ def evaluate_tradein(
     """
     Create or update evaluation for a pickup request and update pickup status.
     """
-    pickup = session.get(PickupRequest, pickup_id)
+    pickup = await session.get(PickupRequest, pickup_id)
     if not pickup:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Pickup request not found"
         )
 
     # Find existing evaluation (if any)
-    evaluation = session.exec(
+    evaluation = (await session.exec(
         select(Evaluation).where(Evaluation.pickup_id == pickup_id)
-    ).first()
+    )).first()
 
     if evaluation:
         evaluation.final_offer = payload.final_offer
@@ -238,9 +211,7 @@ def evaluate_tradein(
     pickup.status = payload.status
     session.add(pickup)
 
-    session.commit()
-    session.refresh(pickup)
-    session.refresh(evaluation)
+    await session.commit()
 
     return {
         "pickup": pickup,
@@ -249,7 +220,7 @@ def evaluate_tradein(
 
 
 @router.delete("/tradeins/{pickup_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_tradein(
+async def delete_tradein(
     pickup_id: int,
     admin: User = Depends(get_current_admin),
     session=Depends(get_session),
@@ -257,19 +228,15 @@ def delete_tradein(
     """
     Delete a pickup request (and its evaluations to avoid FK issues).
     """
-    pickup = session.get(PickupRequest, pickup_id)
-    if not pickup:
+    await session.exec(delete(Evaluation).where(Evaluation.pickup_id == pickup_id))
+
+    result = await session.exec(delete(PickupRequest).where(PickupRequest.id == pickup_id))
+    if result.rowcount == 0:
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Pickup request not found"
         )
 
-    evaluations = session.exec(
-        select(Evaluation).where(Evaluation.pickup_id == pickup_id)
-    ).all()
-    for ev in evaluations:
-        session.delete(ev)
-
-    session.delete(pickup)
-    session.commit()
+    await session.commit()
     return None
 
@@ -1,17 +1,22 @@
 from datetime import timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import select, Session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.db.database import get_session
 from app.db.models import User
 from app.schemas.auth import UserCreate, Token
 from app.core.security import (
-    hash_password,
-    verify_password,
+    ahash_password,
+    averify_password,
+    averify_dummy_password,
+    check_login_rate_limit,
+    password_needs_rehash,
     create_access_token,
     get_current_user,
+    invalidate_user_cache,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 
@@ -20,23 +25,23 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def register(user_in: UserCreate, db: Session = Depends(get_session)):
+async def register(user_in: UserCreate, db: AsyncSession = Depends(get_session)):
     """Register a new user (compatible with frontend format).
     
     Security: All new users are created with 'customer' role.
     The role field is not accepted from the client and is hard-coded server-side
     to prevent privilege escalation attacks.
     """
-    # Check if user exists
-    existing = db.exec(select(User).where(User.email == user_in.email)).first()
-    if existing:
+    # Check if user exists (only the id is fetched; users.email is unique-indexed)
+    existing_id = (await db.exec(select(User.id).where(User.email == user_in.email).limit(1))).first()
+    if existing_id is not None:
         return {
             "success": False,
             "error": "Email already registered"
         }
     
     # Hash password
-    hashed_password = hash_password(user_in.password)
+    hashed_password = await ahash_password(user_in.password)
     
     # Create new user with role="customer" (hard-coded for security)
     new_user = User(
@@ -48,8 +53,7 @@ def register(user_in: UserCreate, db: Session = Depends(get_session)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     
     # Generate JWT token for immediate authentication
     access_token = create_access_token(
@@ -70,12 +74,31 @@ def register(user_in: UserCreate, db: Session = Depends(get_session)):
 
 
 @router.post("/token", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_session)):
+async def login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_session),
+):
+    # Throttle before any DB or hashing work is done
+    client_ip = request.client.host if request.client else "unknown"
+    check_login_rate_limit(client_ip, form_data.username)
+    
     # OAuth2PasswordRequestForm provides username and password fields
-    user = db.exec(select(User).where(User.email == form_data.username)).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    user = (await db.exec(select(User).where(User.email == form_data.username))).first()
+    if not user:
+        # Spend the same hashing time as a wrong password before rejecting
+        await averify_dummy_password(form_data.password)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    if not await averify_password(form_data.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
 
+    # Migrate bcrypt/legacy hashes and outdated Argon2 parameters to current Argon2id
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await ahash_password(form_data.password)
+        db.add(user)
+        await db.commit()
+        invalidate_user_cache(user)
+
     access_token = create_access_token(
         {"sub": str(user.id), "email": user.email, "id": user.id, "role": user.role},
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
@@ -84,7 +107,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 
 
 @router.get("/me")
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current authenticated user information."""
     return {
         "id": current_user.id,
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel import select
 
 from app.db.database import get_session
@@ -19,23 +21,34 @@ class CartItemUpdate(BaseModel):
     qty: int
 
 
-def _get_or_create_cart(user_id: int, session):
-    cart = session.exec(select(Cart).where(Cart.user_id == user_id)).first()
+async def _get_or_create_cart(user_id: int, session):
+    cart = (await session.exec(select(Cart).where(Cart.user_id == user_id))).first()
     if not cart:
-        cart = Cart(user_id=user_id)
-        session.add(cart)
-        session.commit()
-        session.refresh(cart)
+        # INSERT ... ON CONFLICT DO NOTHING RETURNING creates the cart in one statement
+        # and cannot fail if a concurrent request created it first
+        stmt = (
+            pg_insert(Cart)
+            .values(user_id=user_id)
+            .on_conflict_do_nothing(index_elements=["user_id"])
+            .returning(Cart)
+        )
+        cart = (await session.exec(stmt)).scalars().first()
+        if cart is None:
+            cart = (await session.exec(select(Cart).where(Cart.user_id == user_id))).first()
+        await session.commit()
     return cart
 
 
-def _serialize_cart(cart: Cart, session):
-    # Fetch items
-    items = session.exec(select(CartItem).where(CartItem.cart_id == cart.id)).all()
+async def _serialize_cart(cart: Cart, session):
+    # Fetch items with their products in one query (outer join keeps items whose product is gone)
+    rows = (await session.exec(
+        select(CartItem, Product)
+        .join(Product, Product.id == CartItem.product_id, isouter=True)
+        .where(CartItem.cart_id == cart.id)
+    )).all()
     result_items = []
     subtotal = 0.0
-    for item in items:
-        product = session.get(Product, item.product_id)
+    for item, product in rows:
         unit_price = product.list_price or product.base_price or 0.0 if product else 0.0
         line_total = unit_price * item.qty
         subtotal += line_total
@@ -55,19 +68,22 @@ def _serialize_cart(cart: Cart, session):
 
 
 @router.get("/")
-def get_cart(current_user: User = Depends(get_current_user), session=Depends(get_session)):
-    cart = _get_or_create_cart(current_user.id, session)
-    return _serialize_cart(cart, session)
+async def get_cart(current_user: User = Depends(get_current_user), session=Depends(get_session)):
+    cart = await _get_or_create_cart(current_user.id, session)
+    return await _serialize_cart(cart, session)
 
 
 @router.get("/count")
-def get_cart_count(current_user: User = Depends(get_current_user), session=Depends(get_session)):
+async def get_cart_count(current_user: User = Depends(get_current_user), session=Depends(get_session)):
     """Get cart item count and total items quantity."""
-    cart = _get_or_create_cart(current_user.id, session)
-    items = session.exec(select(CartItem).where(CartItem.cart_id == cart.id)).all()
-    
-    count = len(items)  # Number of unique products
-    total_items = sum(item.qty for item in items)  # Total quantity of all items
+    cart = await _get_or_create_cart(current_user.id, session)
+    # Aggregate in the database instead of loading every item
+    count, total_items = (await session.exec(
+        select(
+            func.count(),  # Number of unique products
+            func.coalesce(func.sum(CartItem.qty), 0),  # Total quantity of all items
+        ).where(CartItem.cart_id == cart.id)
+    )).one()
     
     return {
         "count": count,
@@ -76,57 +92,55 @@ def get_cart_count(current_user: User = Depends(get_current_user), session=Depen
 
 
 @router.post("/items", status_code=status.HTTP_201_CREATED)
-def add_item(payload: CartItemCreate, current_user: User = Depends(get_current_user), session=Depends(get_session)):
-    # Validate product
-    product = session.get(Product, payload.product_id)
-    if not product:
+async def add_item(payload: CartItemCreate, current_user: User = Depends(get_current_user), session=Depends(get_session)):
+    # Validate product (only the id is needed)
+    product_id = (await session.exec(select(Product.id).where(Product.id == payload.product_id))).first()
+    if product_id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-    cart = _get_or_create_cart(current_user.id, session)
+    cart = await _get_or_create_cart(current_user.id, session)
 
-    existing = session.exec(
-        select(CartItem).where(
-            CartItem.cart_id == cart.id, CartItem.product_id == payload.product_id
-        )
-    ).first()
-
-    if existing:
-        existing.qty += max(1, payload.qty)
-    else:
-        session.add(CartItem(cart_id=cart.id, product_id=payload.product_id, qty=max(1, payload.qty)))
+    # Insert the item or add to its quantity in one statement; the
+    # (cart_id, product_id) primary key is the conflict target
+    stmt = pg_insert(CartItem).values(cart_id=cart.id, product_id=payload.product_id, qty=max(1, payload.qty))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["cart_id", "product_id"],
+        set_={"qty": CartItem.qty + stmt.excluded.qty},
+    )
+    await session.exec(stmt)
 
-    session.commit()
-    return _serialize_cart(cart, session)
+    await session.commit()
+    return await _serialize_cart(cart, session)
 
 
 @router.put("/items/{product_id}")
-def update_item(product_id: int, payload: CartItemUpdate, current_user: User = Depends(get_current_user), session=Depends(get_session)):
-    cart = _get_or_create_cart(current_user.id, session)
-    item = session.exec(
+async def update_item(product_id: int, payload: CartItemUpdate, current_user: User = Depends(get_current_user), session=Depends(get_session)):
+    cart = await _get_or_create_cart(current_user.id, session)
+    item = (await session.exec(
         select(CartItem).where(CartItem.cart_id == cart.id, CartItem.product_id == product_id)
-    ).first()
+    )).first()
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not in cart")
 
     if payload.qty <= 0:
-        session.delete(item)
+        await session.delete(item)
     else:
         item.qty = payload.qty
-    session.commit()
-    return _serialize_cart(cart, session)
+    await session.commit()
+    return await _serialize_cart(cart, session)
 
 
 @router.delete("/items/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_item(product_id: int, current_user: User = Depends(get_current_user), session=Depends(get_session)):
-    cart = _get_or_create_cart(current_user.id, session)
-    item = session.exec(
+async def delete_item(product_id: int, current_user: User = Depends(get_current_user), session=Depends(get_session)):
+    cart = await _get_or_create_cart(current_user.id, session)
+    item = (await session.exec(
         select(CartItem).where(CartItem.cart_id == cart.id, CartItem.product_id == product_id)
-    ).first()
+    )).first()
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not in cart")
 
-    session.delete(item)
-    session.commit()
+    await session.delete(item)
+    await session.commit()
     return None
 
 
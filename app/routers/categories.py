@@ -1,6 +1,12 @@
-from fastapi import APIRouter, Depends
+import time
+from typing import Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, Depends, Request
 from sqlmodel import select
 
+from app.core.cache import body_etag, etag_response
+from app.core.config import settings
 from app.db.database import get_session
 from app.db.models import Category
 
@@ -31,10 +37,14 @@ CATEGORY_ICON_MAP = {
 }
 
 
-@router.get("/")
-def list_categories(session=Depends(get_session)):
-    """Get categories list with icon support for frontend compatibility."""
-    categories = session.exec(select(Category)).all()
+# Serialized category list as (loaded_at, body, etag). Categories change very
+# rarely, so each worker rebuilds this at most once per CATEGORY_CACHE_TTL.
+_CATEGORIES_CACHE: Optional[Tuple[float, bytes, str]] = None
+
+
+async def _build_categories(session) -> list:
+    """Build the category list from the DB (or the default set when it is empty)."""
+    categories = (await session.exec(select(Category))).all()
     
     if categories:
         # Format categories with icon
@@ -55,5 +65,23 @@ def list_categories(session=Depends(get_session)):
     return DEFAULT_CATEGORIES
 
 
+async def refresh_categories_cache(session) -> Tuple[float, bytes, str]:
+    """Rebuild the serialized category list and its ETag."""
+    global _CATEGORIES_CACHE
+    body = orjson.dumps(await _build_categories(session))
+    _CATEGORIES_CACHE = (time.monotonic(), body, body_etag(body))
+    return _CATEGORIES_CACHE
+
+
+@router.get("/")
+async def list_categories(request: Request, session=Depends(get_session)):
+    """Get categories list with icon support for frontend compatibility."""
+    cached = _CATEGORIES_CACHE
+    if cached is None or time.monotonic() - cached[0] > settings.CATEGORY_CACHE_TTL:
+        cached = await refresh_categories_cache(session)
+    _, body, etag = cached
+    return etag_response(request, body, etag, f"public, max-age={settings.CATEGORY_CACHE_TTL}")
+
+
 
 
@@ -26,12 +26,12 @@ class EvaluationCreate(BaseModel):
 
 
 @router.post("/evaluations", status_code=status.HTTP_201_CREATED)
-def create_evaluation(
+async def create_evaluation(
     payload: EvaluationCreate,
     evaluator: User = Depends(get_current_evaluator),
     session=Depends(get_session),
 ):
-    pr = session.get(PickupRequest, payload.pickup_id)
+    pr = await session.get(PickupRequest, payload.pickup_id)
     if not pr:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pickup request not found")
 
@@ -50,8 +50,7 @@ def create_evaluation(
     pr.status = "offered"
     session.add(pr)
 
-    session.commit()
-    session.refresh(ev)
+    await session.commit()
     return ev
 
 
@@ -1,4 +1,7 @@
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app.core.cache import body_etag, etag_response
 
 router = APIRouter(prefix="/api/locations", tags=["Locations"])
 
@@ -8,23 +11,39 @@ LOCATIONS = [
     {"id": "ottawa", "name": "Ottawa", "code": "OTT", "hub_name": "Ottawa Lab"},
     {"id": "edmonton", "name": "Edmonton", "code": "EDM", "hub_name": "Edmonton Studio"},
 ]
+LOCATIONS_BY_ID = {loc["id"]: loc for loc in LOCATIONS}
+
+# The locations never change at runtime, so serialize them once and let
+# browsers and CDNs cache the responses
+LOCATIONS_CACHE_CONTROL = "public, max-age=3600, s-maxage=86400, stale-while-revalidate=86400"
+
+
+def _serialize(data) -> tuple:
+    """Serialize data once and pair it with its ETag."""
+    body = orjson.dumps(data)
+    return body, body_etag(body)
+
+
+_LOCATIONS_BODY = _serialize(LOCATIONS)
+_LOCATION_BODIES = {loc_id: _serialize(loc) for loc_id, loc in LOCATIONS_BY_ID.items()}
 
 
 @router.get("/")
-def list_locations():
+async def list_locations(request: Request):
     """Get list of available locations."""
-    return LOCATIONS
+    body, etag = _LOCATIONS_BODY
+    return etag_response(request, body, etag, LOCATIONS_CACHE_CONTROL)
 
 
 @router.get("/{location_id}")
-def get_location(location_id: str):
+async def get_location(location_id: str, request: Request):
     """Get location details by ID."""
-    location = next((loc for loc in LOCATIONS if loc["id"] == location_id), None)
-    if not location:
-        from fastapi import HTTPException, status
+    cached = _LOCATION_BODIES.get(location_id)
+    if not cached:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Location '{location_id}' not found"
         )
-    return location
+    body, etag = cached
+    return etag_response(request, body, etag, LOCATIONS_CACHE_CONTROL)
 
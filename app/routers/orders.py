@@ -1,12 +1,18 @@
-import json
 import os
+from decimal import ROUND_HALF_UP, Decimal
 from typing import Optional
 
+import orjson
 import stripe
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.dialects.postgresql import distinct_on
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import select
 
-from app.core.security import get_current_user
+from app.core.security import get_current_user, invalidate_user_cache
 from app.db.database import get_session
 from app.db.models import Cart, CartItem, Order, OrderItem, Payment, Product, User
 from app.schemas.order import CheckoutRequest, OrderCreate, ShippingAddressSchema
@@ -17,11 +23,20 @@ router = APIRouter(prefix="/api/orders", tags=["Orders"])
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 
+# Page size bounds for the current user's order list
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
-def _update_user_info_from_shipping_address(user: User, shipping_address: Optional[ShippingAddressSchema], session) -> None:
-    """Update user information from shipping address if user info is empty."""
+
+async def _update_user_info_from_shipping_address(user: User, shipping_address: Optional[ShippingAddressSchema], session) -> bool:
+    """Update user information from shipping address if user info is empty.
+    
+    The change is committed with the caller's order transaction; returns True
+    if the user was modified, so the caller can invalidate the user cache
+    after that commit.
+    """
     if not shipping_address:
-        return
+        return False
     
     updated = False
     
@@ -35,10 +50,33 @@ def _update_user_info_from_shipping_address(user: User, shipping_address: Option
         user.phone_number = shipping_address.phone
         updated = True
     
-    # Commit changes if any updates were made
     if updated:
         session.add(user)
-        session.commit()
+    return updated
+
+
+# Conditional stock deduction, executed once per product with executemany
+_DEDUCT_STOCK = (
+    update(Product.__table__)
+    .where(Product.__table__.c.id == bindparam("pid"), Product.__table__.c.qty >= bindparam("n"))
+    .values(qty=Product.__table__.c.qty - bindparam("n"))
+)
+
+# Puts stock back for an order that is cancelled before payment
+_RESTORE_STOCK = (
+    update(Product.__table__)
+    .where(Product.__table__.c.id == bindparam("pid"))
+    .values(qty=Product.__table__.c.qty + bindparam("n"))
+)
+
+
+def _to_cents(amount: float) -> int:
+    """Convert a dollar amount to integer cents for Stripe, rounding half up.
+    
+    Going through the decimal string avoids float artefacts such as
+    1.005 * 100 == 100.49999999999999.
+    """
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
 
 
 def _get_product_image(product: Product) -> Optional[str]:
@@ -51,8 +89,8 @@ def _get_product_image(product: Product) -> Optional[str]:
     # 如果数据库返回的是字符串(SQLite遗留)，尝试解析
     if isinstance(images, str):
         try:
-            images = json.loads(images)
-        except:
+            images = orjson.loads(images)
+        except (TypeError, ValueError):  # orjson.JSONDecodeError is a ValueError
             return None
             
     # 如果已经是列表(PostgreSQL)，直接使用
@@ -63,16 +101,22 @@ def _get_product_image(product: Product) -> Optional[str]:
     return None
 
 
-def _compute_cart_totals(user_id: int, session) -> dict:
-    cart = session.exec(select(Cart).where(Cart.user_id == user_id)).first()
-    if not cart:
+async def _compute_cart_totals(user_id: int, session) -> dict:
+    # Cart, its items and their products in one round trip; the outer joins
+    # keep an empty cart (item is None) and items whose product is gone
+    rows = (await session.exec(
+        select(Cart, CartItem, Product)
+        .join(CartItem, CartItem.cart_id == Cart.id, isouter=True)
+        .join(Product, Product.id == CartItem.product_id, isouter=True)
+        .where(Cart.user_id == user_id)
+    )).all()
+    if not rows:
         return {"cart": None, "items": [], "subtotal": 0.0}
-    items = session.exec(select(CartItem).where(CartItem.cart_id == cart.id)).all()
+    cart = rows[0][0]
     subtotal = 0.0
     expanded_items = []
-    for item in items:
-        product = session.get(Product, item.product_id)
-        if not product:
+    for _, item, product in rows:
+        if not item or not product:
             # skip missing products
             continue
         unit_price = product.list_price or product.base_price or 0.0
@@ -82,37 +126,70 @@ def _compute_cart_totals(user_id: int, session) -> dict:
     return {"cart": cart, "items": expanded_items, "subtotal": subtotal}
 
 
-def _check_and_deduct_inventory(items: list, session) -> None:
-    """Check inventory and deduct stock for order items.
+def _requested_quantities(items) -> dict:
+    """Total requested quantity per product id, in item order.
     
-    Args:
-        items: List of items, each containing (item, product, unit_price, line_total) for create_order
-               OR list of CartItemSchema objects for checkout_compatible
-        session: Database session
-        
-    Raises:
-        HTTPException: If any product has insufficient inventory
+    Accepts the (item, product, unit_price, line_total) tuples of create_order
+    or the CartItemSchema objects of checkout_compatible.
     """
+    requested = {}
     for item_data in items:
         # Handle different item formats
         if isinstance(item_data, tuple) and len(item_data) == 4:
             # Format from _compute_cart_totals: (item, product, unit_price, line_total)
             cart_item, product, unit_price, line_total = item_data
-            request_qty = cart_item.qty
-            product_id = product.id
-            product_title = product.title
+            product_id, request_qty = product.id, cart_item.qty
         else:
             # Format from checkout_compatible: CartItemSchema object
             product_id = item_data.id if hasattr(item_data, 'id') else item_data.get('id')
             request_qty = item_data.quantity if hasattr(item_data, 'quantity') else item_data.get('quantity', 1)
-            
-            product = session.get(Product, product_id)
-            if not product:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Product with ID {product_id} not found"
-                )
-            product_title = product.title
+        requested[product_id] = requested.get(product_id, 0) + request_qty
+    return requested
+
+
+async def _check_and_deduct_inventory(items: list, session) -> dict:
+    """Check inventory and deduct stock for order items.
+    
+    The products are locked with SELECT ... FOR UPDATE (in id order, so
+    concurrent checkouts cannot deadlock) before the check, and the deduction
+    is one conditional executemany UPDATE, so two checkouts can no longer
+    both pass the check for the last units.
+    
+    Args:
+        items: List of items, each containing (item, product, unit_price, line_total) for create_order
+               OR list of CartItemSchema objects for checkout_compatible
+        session: Database session
+    
+    Returns:
+        Dict of product_id -> locked Product for every ordered product
+        
+    Raises:
+        HTTPException: If any product is missing or has insufficient inventory
+    """
+    requested = _requested_quantities(items)
+    if not requested:
+        return {}
+    
+    # Lock the rows and load current stock; populate_existing refreshes
+    # products already in the session with the locked values
+    products = {
+        product.id: product
+        for product in (await session.exec(
+            select(Product)
+            .where(Product.id.in_(requested))
+            .order_by(Product.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )).all()
+    }
+    
+    for product_id, request_qty in requested.items():
+        product = products.get(product_id)
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product with ID {product_id} not found"
+            )
         
         # Check inventory
         if product.qty < request_qty:
@@ -120,22 +197,77 @@ def _check_and_deduct_inventory(items: list, session) -> None:
             if available_qty == 0:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Product '{product_title}' is out of stock"
+                    detail=f"Product '{product.title}' is out of stock"
                 )
             else:
                 # Format error message as requested: "Product 'iPhone 14' is out of stock (Only 2 left)"
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Product '{product_title}' is out of stock (Only {available_qty} left)"
+                    detail=f"Product '{product.title}' is out of stock (Only {available_qty} left)"
                 )
-        
-        # Deduct inventory
-        product.qty -= request_qty
-        session.add(product)
+    
+    # Deduct inventory in one round trip; the qty guard keeps stock from going
+    # negative even if a row was somehow changed outside the lock
+    result = await session.exec(
+        _DEDUCT_STOCK,
+        params=[{"pid": product_id, "n": request_qty} for product_id, request_qty in requested.items()],
+    )
+    if result.rowcount != len(requested):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Inventory changed while placing the order, please try again"
+        )
+    
+    # Keep the loaded products in step with the database
+    for product_id, request_qty in requested.items():
+        set_committed_value(products[product_id], "qty", products[product_id].qty - request_qty)
+    return products
+
+
+async def _cancel_unpaid_order(order_id: int, requested: dict, session) -> None:
+    """Cancel a committed pending order whose PaymentIntent could not be created.
+    
+    Runs as its own short transaction and puts the deducted stock back, unless
+    the order already left the pending state.
+    """
+    result = await session.exec(
+        update(Order).where(Order.id == order_id, Order.status == "pending").values(status="cancelled")
+    )
+    if result.rowcount:
+        await session.exec(
+            _RESTORE_STOCK,
+            params=[{"pid": product_id, "n": request_qty} for product_id, request_qty in requested.items()],
+        )
+    await session.commit()
+
+
+async def _record_payment(order_id: int, payment_intent, amount: float, session) -> None:
+    """Store the initial payment row for a committed order in its own short transaction.
+    
+    The webhook upserts on stripe_pi and may get there first, so conflicts are
+    ignored; a failure here is only logged because the webhook records the
+    payment once it succeeds.
+    """
+    try:
+        await session.exec(
+            pg_insert(Payment)
+            .values(
+                order_id=order_id,
+                stripe_pi=payment_intent.id,
+                amount=amount,
+                currency="usd",
+                status=payment_intent.status,
+            )
+            .on_conflict_do_nothing(index_elements=["stripe_pi"])
+        )
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        print(f"Warning: could not record payment {payment_intent.id} for order {order_id}: {e}")
 
 
 @router.post("/")
-def create_order(
+async def create_order(
     order_create: OrderCreate = Body(None),
     current_user: User = Depends(get_current_user),
     session=Depends(get_session),
@@ -144,7 +276,7 @@ def create_order(
     if not stripe.api_key:
         raise HTTPException(status_code=500, detail="Stripe secret key is not configured")
 
-    totals = _compute_cart_totals(current_user.id, session)
+    totals = await _compute_cart_totals(current_user.id, session)
     if not totals["items"]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty")
 
@@ -155,13 +287,15 @@ def create_order(
 
     # Convert shippingAddress to dict for JSON storage
     shipping_address_json = None
+    user_updated = False
     if order_create and order_create.shippingAddress:
         shipping_address_json = order_create.shippingAddress.model_dump(exclude_none=True)
         # Update user info from shipping address if empty
-        _update_user_info_from_shipping_address(current_user, order_create.shippingAddress, session)
+        user_updated = await _update_user_info_from_shipping_address(current_user, order_create.shippingAddress, session)
 
     # Check and deduct inventory BEFORE creating order
-    _check_and_deduct_inventory(totals["items"], session)
+    await _check_and_deduct_inventory(totals["items"], session)
+    requested = _requested_quantities(totals["items"])
 
     # Create order in pending state
     order = Order(
@@ -174,53 +308,62 @@ def create_order(
         shipping_address_json=shipping_address_json,
     )
     session.add(order)
-    session.commit()
-    session.refresh(order)
-
-    # Create order items snapshot
-    for (item, product, unit_price, line_total) in totals["items"]:
-        session.add(
-            OrderItem(
-                order_id=order.id,
-                product_id=product.id,
-                title_snapshot=product.title,
-                unit_price=unit_price,
-                qty=item.qty,
-                line_total=line_total,
-            )
-        )
-    session.commit()
-
-    # Create Stripe PaymentIntent
-    amount_cents = int(round(total * 100))
-    payment_intent = stripe.PaymentIntent.create(
-        amount=amount_cents,
-        currency="usd",
-        metadata={
-            "order_id": str(order.id),
-            "user_id": str(current_user.id),
-        },
-        description=f"Order #{order.id}",
-        automatic_payment_methods={"enabled": True},
+    # Flush to get order.id before creating order items (required for OrderItem.order_id)
+    await session.flush()
+
+    # Create order items snapshot with a single executemany INSERT
+    await session.exec(
+        insert(OrderItem),
+        params=[
+            {
+                "order_id": order.id,
+                "product_id": product.id,
+                "title_snapshot": product.title,
+                "image_snapshot": _get_product_image(product),
+                "unit_price": unit_price,
+                "qty": item.qty,
+                "line_total": line_total,
+            }
+            for (item, product, unit_price, line_total) in totals["items"]
+        ],
     )
 
-    # Record payment row (initial state)
-    session.add(
-        Payment(
-            order_id=order.id,
-            stripe_pi=payment_intent.id,
-            amount=total,
+    # Commit the pending order first, so the product row locks and the pool
+    # connection are released before waiting on Stripe
+    await session.commit()
+    if user_updated:
+        invalidate_user_cache(current_user)
+
+    # Create Stripe PaymentIntent; if that fails the order is cancelled and
+    # its stock put back
+    try:
+        # Async variant (httpx) so the Stripe round trip does not block the event loop
+        payment_intent = await stripe.PaymentIntent.create_async(
+            amount=_to_cents(total),
             currency="usd",
-            status=payment_intent.status,
+            metadata={
+                "order_id": str(order.id),
+                "user_id": str(current_user.id),
+            },
+            description=f"Order #{order.id}",
+            automatic_payment_methods={"enabled": True},
+            # Capture asynchronously on Stripe's side so confirmation returns sooner
+            capture_method="automatic_async",
+            # Retries of this request to Stripe (ours or the library's) reuse the same intent
+            idempotency_key=f"order-{current_user.id}-{order.id}",
         )
-    )
-    session.commit()
+    except Exception as e:
+        await _cancel_unpaid_order(order.id, requested, session)
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Payment processing failed: {str(e)}")
+
+    # Record payment row (initial state)
+    await _record_payment(order.id, payment_intent, total, session)
 
     return {"order_id": order.id, "client_secret": payment_intent.client_secret}
 
 
 @router.post("/checkout")
-def checkout_compatible(
+async def checkout_compatible(
     orderData: CheckoutRequest,
     current_user: User = Depends(get_current_user),
     session=Depends(get_session),
@@ -248,14 +391,15 @@ def checkout_compatible(
     
     # Convert shippingAddress to dict for JSON storage
     shipping_address_json = None
+    user_updated = False
     if orderData.shippingAddress:
         shipping_address_json = orderData.shippingAddress.model_dump(exclude_none=True)
         # Update user info from shipping address if empty
-        _update_user_info_from_shipping_address(current_user, orderData.shippingAddress, session)
+        user_updated = await _update_user_info_from_shipping_address(current_user, orderData.shippingAddress, session)
     
     try:
         # Check and deduct inventory BEFORE creating order
-        _check_and_deduct_inventory(items, session)
+        products = await _check_and_deduct_inventory(items, session)
         
         # Create order
         order = Order(
@@ -270,39 +414,44 @@ def checkout_compatible(
         session.add(order)
         
         # Flush to get order.id before creating order items (required for OrderItem.order_id)
-        session.flush()
+        await session.flush()
         
-        # Create order items
+        # Create order items with a single executemany INSERT
+        order_item_rows = []
         for item in items:
-            product = session.get(Product, item.id)
+            product = products.get(item.id)
             if not product:
                 # This should not happen if inventory check passed, but add safety check
-                session.rollback()
+                await session.rollback()
                 return {
                     "success": False,
                     "error": f"Product with ID {item.id} not found. Please refresh and try again."
                 }
-            session.add(
-                OrderItem(
-                    order_id=order.id,
-                    product_id=product.id,
-                    title_snapshot=item.name or product.title,
-                    unit_price=item.price,
-                    qty=item.quantity,
-                    line_total=item.price * item.quantity,
-                )
-            )
+            order_item_rows.append({
+                "order_id": order.id,
+                "product_id": product.id,
+                "title_snapshot": item.name or product.title,
+                "image_snapshot": _get_product_image(product),
+                "unit_price": item.price,
+                "qty": item.quantity,
+                "line_total": item.price * item.quantity,
+            })
+        await session.exec(insert(OrderItem), params=order_item_rows)
         
         # Create Stripe PaymentIntent if using credit card
         payment_method = orderData.paymentMethod
         payment_intent = None
         
         if payment_method == "card" or payment_method == "credit":
+            # Commit the pending order first, so the product row locks and the
+            # pool connection are released before waiting on Stripe
+            await session.commit()
+            if user_updated:
+                invalidate_user_cache(current_user)
+            
             try:
-                # order.id is already available from flush above
-                
-                amount_cents = int(round(total * 100))
-                payment_intent = stripe.PaymentIntent.create(
+                amount_cents = _to_cents(total)
+                payment_intent = await stripe.PaymentIntent.create_async(
                     amount=amount_cents,
                     currency="usd",
                     metadata={
@@ -311,30 +460,23 @@ def checkout_compatible(
                     },
                     description=f"Order #{order.id}",
                     automatic_payment_methods={"enabled": True},
-                )
-                
-                session.add(
-                    Payment(
-                        order_id=order.id,
-                        stripe_pi=payment_intent.id,
-                        amount=total,
-                        currency="usd",
-                        status=payment_intent.status,
-                    )
+                    capture_method="automatic_async",
+                    idempotency_key=f"order-{current_user.id}-{order.id}",
                 )
             except Exception as e:
-                session.rollback()
+                await _cancel_unpaid_order(order.id, _requested_quantities(items), session)
                 return {
                     "success": False,
                     "error": f"Payment processing failed: {str(e)}"
                 }
+            
+            await _record_payment(order.id, payment_intent, total, session)
         else:
-            # For wallet or COD, mark as paid directly
+            # For wallet or COD, mark as paid directly and commit in one transaction
             order.status = "paid"
-        
-        # Commit all changes in one transaction
-        session.commit()
-        session.refresh(order)
+            await session.commit()
+            if user_updated:
+                invalidate_user_cache(current_user)
         
         # Return response based on payment method
         if payment_method == "card" or payment_method == "credit":
@@ -353,17 +495,35 @@ def checkout_compatible(
             
     except HTTPException as e:
         # Re-raise HTTPException (for inventory errors)
-        session.rollback()
+        await session.rollback()
         raise
     except Exception as e:
         # Handle any other errors
-        session.rollback()
+        await session.rollback()
         return {
             "success": False,
             "error": f"Order creation failed: {str(e)}"
         }
 
 
+async def _record_succeeded_payment(order_id: int, pi, session) -> None:
+    """Update or create the payment for a succeeded PaymentIntent and commit.
+    
+    One statement, keyed on the unique PaymentIntent id.
+    """
+    amount = (pi.get("amount_received") or pi.get("amount") or 0) / 100.0
+    currency = pi.get("currency", "usd")
+    await session.exec(
+        pg_insert(Payment)
+        .values(order_id=order_id, stripe_pi=pi["id"], amount=amount, currency=currency, status="succeeded")
+        .on_conflict_do_update(
+            index_elements=["stripe_pi"],
+            set_={"status": "succeeded", "amount": amount, "currency": currency},
+        )
+    )
+    await session.commit()
+
+
 @router.post("/stripe-webhook")
 async def stripe_webhook(request: Request, session=Depends(get_session)):
     payload = await request.body()
@@ -373,8 +533,11 @@ async def stripe_webhook(request: Request, session=Depends(get_session)):
         raise HTTPException(status_code=500, detail="Stripe webhook secret is not configured")
 
     try:
-        event = stripe.Webhook.construct_event(
-            payload=payload, sig_header=sig_header, secret=STRIPE_WEBHOOK_SECRET
+        # Signature check and event parsing run in the threadpool so large
+        # webhook bodies do not hold up the event loop
+        event = await run_in_threadpool(
+            stripe.Webhook.construct_event,
+            payload=payload, sig_header=sig_header, secret=STRIPE_WEBHOOK_SECRET,
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Webhook error: {e}")
@@ -384,39 +547,32 @@ async def stripe_webhook(request: Request, session=Depends(get_session)):
         metadata = pi.get("metadata", {})
         order_id: Optional[int] = int(metadata.get("order_id")) if metadata.get("order_id") else None
         if order_id:
-            order = session.get(Order, order_id)
-            if order and order.status != "paid":
-                order.status = "paid"
-                # Update or create payment
-                payment = session.exec(
-                    select(Payment).where(Payment.order_id == order.id, Payment.stripe_pi == pi["id"])
-                ).first()
-                amount = (pi.get("amount_received") or pi.get("amount") or 0) / 100.0
-                currency = pi.get("currency", "usd")
-                if payment:
-                    payment.status = "succeeded"
-                    payment.amount = amount
-                    payment.currency = currency
-                else:
-                    session.add(
-                        Payment(
-                            order_id=order.id,
-                            stripe_pi=pi["id"],
-                            amount=amount,
-                            currency=currency,
-                            status="succeeded",
-                        )
+            # Only a pending order becomes paid; matches no row if it is unknown,
+            # already paid, or was cancelled (its stock already put back)
+            marked = await session.exec(
+                update(Order).where(Order.id == order_id, Order.status == "pending").values(status="paid")
+            )
+            if marked.rowcount:
+                await _record_succeeded_payment(order_id, pi, session)
+            else:
+                current_status = (await session.exec(select(Order.status).where(Order.id == order_id))).first()
+                if current_status == "cancelled":
+                    # Stripe created the intent although our call failed (e.g. timed out);
+                    # keep the payment on record so it can be refunded, but leave the order cancelled
+                    print(
+                        f"Warning: PaymentIntent {pi['id']} succeeded for cancelled order {order_id}; "
+                        "refund it or re-open the order manually"
                     )
-                session.commit()
+                    await _record_succeeded_payment(order_id, pi, session)
 
     return {"received": True}
 
 
 @router.get("/me")
-def get_my_orders(
+async def get_my_orders(
     status: Optional[str] = None,
-    limit: Optional[int] = 50,
-    offset: int = 0,
+    limit: Optional[int] = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_user),
     session=Depends(get_session),
 ):
@@ -427,29 +583,43 @@ def get_my_orders(
     if status:
         stmt = stmt.where(Order.status == status)
     
-    # Get all orders first
-    orders = session.exec(stmt).all()
-    
-    # Sort by created_at descending (newest first), fallback to id if created_at is None
-    orders = sorted(orders, key=lambda o: (o.created_at or ""), reverse=True)
-    
-    # Apply pagination after sorting
+    # Sort by created_at descending (newest first, orders without created_at last)
+    # and paginate in the database
+    stmt = stmt.order_by(Order.created_at.desc().nulls_last(), Order.id.desc())
     if offset:
-        orders = orders[offset:]
+        stmt = stmt.offset(offset)
     if limit:
-        orders = orders[:limit]
+        stmt = stmt.limit(limit)
+    orders = (await session.exec(stmt)).all()
+    
+    # Load items and payments for the whole page in two queries instead of one
+    # round trip per order. Items carry title/image snapshots, so products are
+    # not read at all.
+    order_ids = [order.id for order in orders]
+    items_by_order = {order_id: [] for order_id in order_ids}
+    payment_by_order = {}
+    if order_ids:
+        order_items = (await session.exec(
+            select(OrderItem).where(OrderItem.order_id.in_(order_ids))
+        )).all()
+        for item in order_items:
+            items_by_order[item.order_id].append(item)
+        
+        # Most recent payment per order, picked by Postgres (DISTINCT ON)
+        payments = (await session.exec(
+            select(Payment)
+            .where(Payment.order_id.in_(order_ids))
+            .ext(distinct_on(Payment.order_id))
+            .order_by(Payment.order_id, Payment.id.desc())
+        )).all()
+        for payment in payments:
+            payment_by_order[payment.order_id] = payment
     
     # Format response with order items
     result = []
     for order in orders:
-        # Get order items
-        order_items = session.exec(
-            select(OrderItem).where(OrderItem.order_id == order.id)
-        ).all()
-        
         items = []
-        for item in order_items:
-            product = session.get(Product, item.product_id)
+        for item in items_by_order[order.id]:
             items.append({
                 "product_id": item.product_id,
                 "title": item.title_snapshot,
@@ -457,17 +627,13 @@ def get_my_orders(
                 "qty": item.qty,
                 "line_total": item.line_total,
                 "product": {
-                    "id": product.id if product else None,
-                    "title": product.title if product else item.title_snapshot,
-                    "image": _get_product_image(product) if product else None,
-                } if product else None,
+                    "id": item.product_id,
+                    "title": item.title_snapshot,
+                    "image": item.image_snapshot,
+                },
             })
         
-        # Get payment information (get the most recent one)
-        payments = session.exec(
-            select(Payment).where(Payment.order_id == order.id)
-        ).all()
-        payment = sorted(payments, key=lambda p: p.id or 0, reverse=True)[0] if payments else None
+        payment = payment_by_order.get(order.id)
         
         result.append({
             "id": order.id,
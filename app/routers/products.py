@@ -1,11 +1,19 @@
-import json
-from typing import Optional
+import time
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import cast, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import defer
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import select
 
+from app.core.cache import cache_get, cache_set, not_modified, product_list_key, version_etag
+from app.core.config import settings
 from app.db.database import get_session
-from app.db.models import Brand, Category, Product
+from app.db.models import PRODUCT_PRICE, Brand, Category, Product
 from app.schemas.product import ProductResponse
 
 
@@ -19,6 +27,57 @@ CONDITION_MAP = {
     "C": "Like-new",
 }
 
+# Product card listings only read description/cost_components_json as a fallback
+# when highlights_json is empty, so those wide columns are loaded on demand
+PRODUCT_LISTING_OPTIONS = (
+    defer(Product.description),
+    defer(Product.cost_components_json),
+)
+
+# Browsers/CDNs may reuse product responses briefly and revalidate them with the ETag
+PRODUCT_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
+# list_products is offset-paginated in SQL. When a page is full, the offset to
+# pass for the next page is returned in this header (the body stays a plain list).
+NEXT_OFFSET_HEADER = "X-Next-Offset"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Serializes product pages exactly as the list[ProductResponse] response model would.
+# Handlers return the bytes in a Response, so the ProductResponse objects they just
+# built are not validated a second time; response_model stays for the OpenAPI schema.
+_PRODUCT_LIST_ADAPTER = TypeAdapter(list[ProductResponse])
+
+# Category/brand name -> id lookups as (loaded_at, category_ids, category_ids_lower,
+# brand_ids). Names change very rarely, so each worker reloads them at most once
+# per CATALOG_LOOKUP_CACHE_TTL instead of querying on every filtered request.
+_NAME_LOOKUPS: Optional[Tuple[float, dict, dict, dict]] = None
+
+# Phrases picked out of product descriptions as highlights, with their display
+# form precomputed (description lowercased once, then one C-level scan per phrase)
+DESCRIPTION_HIGHLIGHTS = tuple(
+    (phrase, phrase.title())
+    for phrase in (
+        "certified inspection",
+        "unlocked",
+        "includes charger",
+        "battery health",
+        "warranty",
+        "apple pencil",
+        "liquid retina",
+        "dynamic amoled",
+        "fast charger",
+        "s pen",
+        "120hz display",
+    )
+)
+
+# Highlights shown when neither the description nor the cost components yield any
+DEFAULT_HIGHLIGHTS = ["Certified inspection", "Store warranty"]
+
+# Cities shown for products without an explicit city_availability_json
+DEFAULT_CITY_AVAILABILITY = ["Vancouver", "Ottawa", "Edmonton"]
+
 
 def _parse_images_json(images_json: Optional[list] | Optional[str]) -> str:
     """Extract first image URL from JSON list or string, or return placeholder."""
@@ -31,7 +90,7 @@ def _parse_images_json(images_json: Optional[list] | Optional[str]) -> str:
     else:
         # Legacy string format - try to parse
         try:
-            images = json.loads(images_json) if isinstance(images_json, str) else images_json
+            images = orjson.loads(images_json) if isinstance(images_json, str) else images_json
         except:
             return "https://via.placeholder.com/480x360.png?text=Product"
     
@@ -49,22 +108,9 @@ def _parse_highlights(product: Product) -> list[str]:
     if product.description:
         # Try to extract from description (simple approach)
         desc_lower = product.description.lower()
-        common_highlights = [
-            "certified inspection",
-            "unlocked",
-            "includes charger",
-            "battery health",
-            "warranty",
-            "apple pencil",
-            "liquid retina",
-            "dynamic amoled",
-            "fast charger",
-            "s pen",
-            "120hz display",
-        ]
-        for hl in common_highlights:
-            if hl in desc_lower:
-                highlights.append(hl.title())
+        for phrase, title in DESCRIPTION_HIGHLIGHTS:
+            if phrase in desc_lower:
+                highlights.append(title)
     
     # Also check cost_components_json
     if product.cost_components_json:
@@ -74,7 +120,7 @@ def _parse_highlights(product: Product) -> list[str]:
         else:
             # Legacy string format - try to parse
             try:
-                components = json.loads(product.cost_components_json) if isinstance(product.cost_components_json, str) else product.cost_components_json
+                components = orjson.loads(product.cost_components_json) if isinstance(product.cost_components_json, str) else product.cost_components_json
             except:
                 components = None
         
@@ -86,9 +132,9 @@ def _parse_highlights(product: Product) -> list[str]:
     
     # Default highlights if none found
     if not highlights:
-        highlights = ["Certified inspection", "Store warranty"]
+        highlights = DEFAULT_HIGHLIGHTS
     
-    return highlights[:5]  # Limit to 5 highlights
+    return highlights[:5]  # Limit to 5 highlights (the slice is a fresh list)
 
 
 def _parse_json_array(json_data: Optional[list] | Optional[str], default: list = None) -> list:
@@ -105,7 +151,7 @@ def _parse_json_array(json_data: Optional[list] | Optional[str], default: list =
     # Legacy string format - try to parse
     if isinstance(json_data, str):
         try:
-            parsed = json.loads(json_data)
+            parsed = orjson.loads(json_data)
             if isinstance(parsed, list):
                 return parsed
         except:
@@ -114,6 +160,70 @@ def _parse_json_array(json_data: Optional[list] | Optional[str], default: list =
     return default
 
 
+async def _load_highlight_fallbacks(session, products) -> None:
+    """Load the deferred fallback columns for products with empty highlights_json.
+
+    Deferred attributes cannot be lazy-loaded implicitly on an AsyncSession, so
+    they are fetched for the whole page in one query and set on the instances.
+    """
+    by_id = {product.id: product for product in products if not _parse_json_array(product.highlights_json)}
+    if not by_id:
+        return
+    rows = (await session.exec(
+        select(Product.id, Product.description, Product.cost_components_json).where(Product.id.in_(by_id))
+    )).all()
+    for product_id, description, cost_components in rows:
+        set_committed_value(by_id[product_id], "description", description)
+        set_committed_value(by_id[product_id], "cost_components_json", cost_components)
+
+
+async def _name_lookups(session) -> Tuple[float, dict, dict, dict]:
+    """Return the cached category/brand name -> id maps, reloading them when stale."""
+    global _NAME_LOOKUPS
+    cached = _NAME_LOOKUPS
+    if cached is None or time.monotonic() - cached[0] > settings.CATALOG_LOOKUP_CACHE_TTL:
+        category_ids, category_ids_lower = {}, {}
+        for category_id, name in (await session.exec(select(Category.id, Category.name).order_by(Category.id))).all():
+            category_ids.setdefault(name, category_id)
+            category_ids_lower.setdefault(name.lower(), category_id)
+        brand_ids = {}
+        for brand_id, name in (await session.exec(select(Brand.id, Brand.name).order_by(Brand.id))).all():
+            brand_ids.setdefault(name, brand_id)
+        cached = _NAME_LOOKUPS = (time.monotonic(), category_ids, category_ids_lower, brand_ids)
+    return cached
+
+
+async def _category_id(session, name: str, ignore_case: bool = False) -> Optional[int]:
+    """Id of the category with this exact name, or (ignore_case) a case-insensitive match."""
+    _, category_ids, category_ids_lower, _ = await _name_lookups(session)
+    category_id = category_ids.get(name)
+    if category_id is None and ignore_case:
+        category_id = category_ids_lower.get(name.lower())
+    return category_id
+
+
+async def _brand_id(session, name: str) -> Optional[int]:
+    """Id of the brand with this exact (case-sensitive) name."""
+    return (await _name_lookups(session))[3].get(name)
+
+
+def _filter_price(stmt, min_price: Optional[float], max_price: Optional[float]):
+    """Restrict stmt to a price range on PRODUCT_PRICE (backed by ix_products_price)."""
+    if min_price is not None:
+        stmt = stmt.where(PRODUCT_PRICE >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(PRODUCT_PRICE <= max_price)
+    return stmt
+
+
+async def _load_brands(session, products) -> dict:
+    """Load the brands of a page of products in one query, keyed by id."""
+    brand_ids = {product.brand_id for product in products if product.brand_id}
+    if not brand_ids:
+        return {}
+    return {brand.id: brand for brand in (await session.exec(select(Brand).where(Brand.id.in_(brand_ids)))).all()}
+
+
 def _format_product_response(product: Product, brand: Optional[Brand] = None) -> ProductResponse:
     """Convert Product model to ProductResponse format."""
     # Get brand name
@@ -148,7 +258,7 @@ def _format_product_response(product: Product, brand: Optional[Brand] = None) ->
         highlights = _parse_highlights(product)
     
     # Get city availability from database field, or use default
-    city_availability = _parse_json_array(product.city_availability_json, ["Vancouver", "Ottawa", "Edmonton"])
+    city_availability = _parse_json_array(product.city_availability_json, DEFAULT_CITY_AVAILABILITY)
     
     # Get location from database field, or use default
     location = product.location or "Vancouver Hub"
@@ -157,15 +267,11 @@ def _format_product_response(product: Product, brand: Optional[Brand] = None) ->
     rating = product.rating if product.rating is not None else 4.5
     reviews = product.reviews if product.reviews is not None else 0
     
-    # Parse updated_at to YYYYMMDD format
+    # Convert updated_at to YYYYMMDD format
     updated_at_int = None
     if product.updated_at:
-        try:
-            # Assume format like "2025-01-04" or "2025-01-04 12:00:00"
-            date_str = product.updated_at[:10].replace("-", "")
-            updated_at_int = int(date_str)
-        except:
-            pass
+        updated_at = product.updated_at
+        updated_at_int = updated_at.year * 10000 + updated_at.month * 100 + updated_at.day
     
     return ProductResponse(
         id=product.id or 0,
@@ -185,8 +291,17 @@ def _format_product_response(product: Product, brand: Optional[Brand] = None) ->
     )
 
 
+def _product_page_response(body: bytes, etag: str, next_offset: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": PRODUCT_CACHE_CONTROL}
+    if next_offset:
+        headers[NEXT_OFFSET_HEADER] = next_offset
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/", response_model=list[ProductResponse])
-def list_products(
+async def list_products(
+    request: Request,
+    response: Response,
     category: Optional[str] = Query(
         None, 
         description="Filter by category name. Available categories: 'Phone', 'Laptop', 'Tablet', 'Accessory', 'Watch', 'Headphones'. Case-insensitive matching is supported."
@@ -211,6 +326,8 @@ def list_products(
         None, 
         description="Filter by city availability. Valid cities: 'Vancouver', 'Ottawa', 'Edmonton'. Case-insensitive matching. Filters products based on city_availability_json field."
     ),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of products to return (page size)."),
+    offset: int = Query(0, ge=0, description="Number of products to skip (products are ordered by id)."),
     session=Depends(get_session),
 ):
     """Get products list with optional filters.
@@ -221,26 +338,45 @@ def list_products(
     - Brand: Must match exactly (case-sensitive)
     - Condition: Must be one of 'A', 'B', or 'C' (case-insensitive)
     - Price range: Uses resale_price if available, otherwise list_price, otherwise base_price
-    - City: Must be in the product's city_availability_json array (case-insensitive)
+    - City: Must be in the product's city_availability_json array (city name is title-cased before matching)
     
     Returns an empty array if no products match the criteria or if a specified category/brand doesn't exist.
+    
+    Results are ordered by id and paginated with limit/offset; when the page is full
+    the next offset is returned in the X-Next-Offset header.
+    
+    The response carries an ETag derived from the catalog version (product count
+    and latest updated_at) and the query string; a matching If-None-Match gets a 304.
+    The serialized page is cached under that ETag, so product writes miss it naturally.
     """
+    # Catalog version check before any listing work
+    count, last_updated = (await session.exec(
+        select(func.count(Product.id), func.max(Product.updated_at))
+    )).one()
+    etag = version_etag(count, last_updated, sorted(request.query_params.multi_items()))
+    cached = not_modified(request, etag, PRODUCT_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+    # Validators for the early empty-list returns below
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PRODUCT_CACHE_CONTROL
+    
+    # Cached pages are stored as b"<next offset>\n<JSON body>"
+    cache_key = product_list_key(etag)
+    cached_page = await cache_get(cache_key)
+    if cached_page is not None:
+        next_offset, _, body = cached_page.partition(b"\n")
+        return _product_page_response(body, etag, next_offset.decode())
+    
     # Build query
-    stmt = select(Product)
+    stmt = select(Product).options(*PRODUCT_LISTING_OPTIONS)
     
     # Filter by category if provided
     if category:
-        # Try exact match first
-        cat = session.exec(select(Category).where(Category.name == category)).first()
-        # If not found, try case-insensitive match
-        if not cat:
-            all_categories = session.exec(select(Category)).all()
-            for c in all_categories:
-                if c.name.lower() == category.lower():
-                    cat = c
-                    break
-        if cat:
-            stmt = stmt.where(Product.category_id == cat.id)
+        # Exact match first, then case-insensitive
+        category_id = await _category_id(session, category, ignore_case=True)
+        if category_id is not None:
+            stmt = stmt.where(Product.category_id == category_id)
         else:
             # If category not found, return empty list
             # Log for debugging (can be removed in production)
@@ -249,9 +385,9 @@ def list_products(
     
     # Filter by brand if provided
     if brand:
-        brand_obj = session.exec(select(Brand).where(Brand.name == brand)).first()
-        if brand_obj:
-            stmt = stmt.where(Product.brand_id == brand_obj.id)
+        brand_id = await _brand_id(session, brand)
+        if brand_id is not None:
+            stmt = stmt.where(Product.brand_id == brand_id)
         else:
             # If brand not found, return empty list
             return []
@@ -265,54 +401,53 @@ def list_products(
             # Invalid condition, return empty list
             return []
     
-    # Execute query to get products
-    products = session.exec(stmt).all()
+    # Filter by city availability (JSONB containment, backed by ix_products_city_gin)
+    if city:
+        city_name = city.strip().title()
+        city_filter = Product.city_availability_json.contains([city_name])
+        if city_name in DEFAULT_CITY_AVAILABILITY:
+            # Products without a city list are available in the default cities
+            city_filter = or_(
+                city_filter,
+                Product.city_availability_json.is_(None),
+                Product.city_availability_json == cast("null", JSONB),
+                Product.city_availability_json == cast("[]", JSONB),
+            )
+        stmt = stmt.where(city_filter)
+    
+    # Filter by price range
+    stmt = _filter_price(stmt, min_price, max_price)
+    
+    # Execute query to get one page of products
+    stmt = stmt.order_by(Product.id).offset(offset).limit(limit)
+    products = (await session.exec(stmt)).all()
+    next_offset = str(offset + limit) if len(products) == limit else ""
     
     # Debug: Log number of products found
     if category:
         print(f"DEBUG: Found {len(products)} products for category '{category}'")
     
-    # Filter by price range (applied after query for flexibility with price fields)
-    if min_price is not None or max_price is not None:
-        filtered_products = []
-        for product in products:
-            # Use resale_price, list_price, or base_price as the price
-            price = product.resale_price or product.list_price or product.base_price or 0.0
-            
-            # Apply price filters
-            if min_price is not None and price < min_price:
-                continue
-            if max_price is not None and price > max_price:
-                continue
-            
-            filtered_products.append(product)
-        products = filtered_products
-    
     # Format responses with brand information
+    brands = await _load_brands(session, products)
+    await _load_highlight_fallbacks(session, products)
     products_response = []
     for product in products:
         try:
-            brand_obj = session.get(Brand, product.brand_id) if product.brand_id else None
+            brand_obj = brands.get(product.brand_id)
             product_response = _format_product_response(product, brand_obj)
-            
-            # Filter by city if provided (check cityAvailability)
-            if city:
-                city_availability = product_response.cityAvailability or []
-                city_normalized = city.lower()
-                if not any(c.lower() == city_normalized for c in city_availability):
-                    continue
-            
             products_response.append(product_response)
         except Exception as e:
             # Log error but continue processing other products
             print(f"DEBUG: Error formatting product {product.id}: {e}")
             continue
     
-    return products_response
+    body = _PRODUCT_LIST_ADAPTER.dump_json(products_response)
+    await cache_set(cache_key, next_offset.encode() + b"\n" + body, settings.PRODUCT_LIST_CACHE_TTL)
+    return _product_page_response(body, etag, next_offset)
 
 
 @router.get("/search", response_model=list[ProductResponse])
-def search_products(
+async def search_products(
     q: str = Query(..., description="Search keyword. Searches case-insensitively in product title, model name, and description fields."),
     category: Optional[str] = Query(
         None, 
@@ -342,71 +477,53 @@ def search_products(
     Additional filters (category, brand, price range) can be combined with the search keyword.
     Returns an empty array if no products match the search criteria.
     """
-    # Build search query - search in title, model, and description (case-insensitive)
-    search_lower = q.lower()
-    
-    # Get all products first, then filter in Python (SQLite doesn't support ILIKE well)
-    stmt = select(Product)
+    # Build search query - search in title, model, and description (case-insensitive,
+    # with % and _ in the keyword matched literally)
+    stmt = select(Product).where(or_(
+        Product.title.icontains(q, autoescape=True),
+        Product.model.icontains(q, autoescape=True),
+        Product.description.icontains(q, autoescape=True),
+    ))
     
     # Apply category filter first (more efficient)
     if category:
-        cat = session.exec(select(Category).where(Category.name == category)).first()
-        if cat:
-            stmt = stmt.where(Product.category_id == cat.id)
+        category_id = await _category_id(session, category)
+        if category_id is not None:
+            stmt = stmt.where(Product.category_id == category_id)
         else:
             return []
     
     # Apply brand filter
     if brand:
-        brand_obj = session.exec(select(Brand).where(Brand.name == brand)).first()
-        if brand_obj:
-            stmt = stmt.where(Product.brand_id == brand_obj.id)
+        brand_id = await _brand_id(session, brand)
+        if brand_id is not None:
+            stmt = stmt.where(Product.brand_id == brand_id)
         else:
             return []
     
-    # Execute query
-    products = session.exec(stmt).all()
-    
-    # Filter by search keyword (case-insensitive search in title, model, description)
-    filtered_products = []
-    for product in products:
-        # Check if keyword matches in title, model, or description
-        matches = (
-            (product.title and search_lower in product.title.lower()) or
-            (product.model and search_lower in product.model.lower()) or
-            (product.description and search_lower in product.description.lower())
-        )
-        if matches:
-            filtered_products.append(product)
-    
-    products = filtered_products
-    
     # Filter by price range if provided
-    if min_price is not None or max_price is not None:
-        price_filtered = []
-        for product in products:
-            price = product.resale_price or product.list_price or product.base_price or 0.0
-            if min_price is not None and price < min_price:
-                continue
-            if max_price is not None and price > max_price:
-                continue
-            price_filtered.append(product)
-        products = price_filtered
+    stmt = _filter_price(stmt, min_price, max_price)
+    
+    # Execute query (id order, so results do not depend on the chosen plan)
+    products = (await session.exec(stmt.order_by(Product.id))).all()
     
     # Format responses
+    brands = await _load_brands(session, products)
     products_response = []
     for product in products:
-        brand_obj = session.get(Brand, product.brand_id) if product.brand_id else None
+        brand_obj = brands.get(product.brand_id)
         products_response.append(_format_product_response(product, brand_obj))
     
-    return products_response
+    return Response(content=_PRODUCT_LIST_ADAPTER.dump_json(products_response), media_type="application/json")
 
 
 @router.get("/deals")
-def get_deals(
-    limit: Optional[int] = Query(
+async def get_deals(
+    limit: int = Query(
         10, 
-        description="Maximum number of deals to return. Default is 10. Must be a positive integer. Results are sorted by discount percentage (highest first)."
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="Maximum number of deals to return. Default is 10. Must be between 1 and 200. Results are sorted by discount percentage (highest first)."
     ),
     min_discount: Optional[float] = Query(
         None, 
@@ -425,43 +542,32 @@ def get_deals(
     Results are sorted by discount percentage in descending order (highest discount first).
     Only products with valid pricing and a positive discount are included.
     """
-    # Get all products
-    products = session.exec(select(Product)).all()
-    
-    # Calculate discounts and filter
-    deals = []
-    for product in products:
-        # Current selling price (resale_price or list_price)
-        price = product.resale_price or product.list_price or 0.0
-        # Original price (base_price or list_price)
-        original_price = product.base_price or product.list_price or 0.0
-        
-        # Skip if no valid pricing or if price >= original_price (no discount)
-        if price <= 0 or original_price <= 0 or price >= original_price:
-            continue
-        
-        # Calculate discount percentage
-        discount_percent = ((original_price - price) / original_price) * 100
-        
-        # Skip if discount is too small
-        if discount_percent <= 0:
-            continue
-        
-        if min_discount is not None and discount_percent < min_discount:
-            continue
-        
-        deals.append((product, discount_percent))
-    
-    # Sort by discount percentage (highest first)
-    deals.sort(key=lambda x: x[1], reverse=True)
-    
-    # Limit results
-    deals = deals[:limit] if limit else deals
+    # Current selling price (resale_price or list_price) and original price
+    # (base_price or list_price); the first non-zero one is used, as with `or`
+    zero = literal_column("0")
+    price = func.coalesce(func.nullif(Product.resale_price, zero), func.nullif(Product.list_price, zero), zero)
+    original_price = func.coalesce(func.nullif(Product.base_price, zero), func.nullif(Product.list_price, zero), zero)
+    # NULLIF keeps the division safe whatever order Postgres evaluates the WHERE in
+    discount_percent = ((original_price - price) / func.nullif(original_price, zero) * 100).label("discount_percent")
+    
+    # Only products with valid pricing and a discount, best deals first,
+    # computed and limited in the database
+    stmt = (
+        select(Product, discount_percent)
+        .options(*PRODUCT_LISTING_OPTIONS)
+        .where(price > zero, original_price > zero, price < original_price)
+        .order_by(discount_percent.desc(), Product.id)
+    )
+    if min_discount is not None:
+        stmt = stmt.where(discount_percent >= min_discount)
+    deals = (await session.exec(stmt.limit(limit))).all()
     
     # Format responses
+    brands = await _load_brands(session, [product for product, _ in deals])
+    await _load_highlight_fallbacks(session, [product for product, _ in deals])
     products_response = []
     for product, discount_percent in deals:
-        brand_obj = session.get(Brand, product.brand_id) if product.brand_id else None
+        brand_obj = brands.get(product.brand_id)
         product_response = _format_product_response(product, brand_obj)
         # Add discount information
         product_dict = product_response.model_dump()
@@ -473,8 +579,9 @@ def get_deals(
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(
+async def get_product(
     product_id: int,
+    request: Request,
     session=Depends(get_session)
 ):
     """Get a single product by ID.
@@ -497,11 +604,24 @@ def get_product(
     Raises:
         HTTPException: 404 Not Found if the product doesn't exist
     """
-    product = session.get(Product, product_id)
+    # Revalidation only needs updated_at, so check it before loading the full row
+    if request.headers.get("if-none-match"):
+        updated_at = (await session.exec(select(Product.updated_at).where(Product.id == product_id))).first()
+        cached = not_modified(request, version_etag(product_id, updated_at), PRODUCT_CACHE_CONTROL)
+        if cached is not None:
+            return cached
+    
+    product = await session.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
     
-    brand = session.get(Brand, product.brand_id) if product.brand_id else None
-    return _format_product_response(product, brand)
+    brand = await session.get(Brand, product.brand_id) if product.brand_id else None
+    # The model was just built, so serialize it directly instead of having
+    # FastAPI validate it again against response_model
+    return Response(
+        content=_format_product_response(product, brand).model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": version_etag(product_id, product.updated_at), "Cache-Control": PRODUCT_CACHE_CONTROL},
+    )
 
 
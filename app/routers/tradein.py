@@ -1,12 +1,14 @@
-import json
 import os
 from typing import Optional
 from datetime import datetime
 
+import orjson
 from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, UploadFile, status
 from pydantic import BaseModel
+from sqlalchemy.orm import defer
 from sqlmodel import select
 
+from app.core.config import settings
 from app.core.security import get_current_user
 from app.db.database import get_session
 from app.db.models import Brand, Evaluation, PickupRequest, User
@@ -23,6 +25,14 @@ class RespondPayload(BaseModel):
     action: str  # "accept" or "reject"
 
 
+class EstimatePayload(BaseModel):
+    brand: Optional[str] = None
+    model: Optional[str] = None
+    storage: Optional[str] = None
+    condition: Optional[str] = None  # "A", "B" or "C"
+    notes: Optional[str] = None
+
+
 async def save_uploaded_photos(files: list[UploadFile], pickup_request_id: int) -> list[str]:
     """Save uploaded photos and return list of file paths/URLs."""
     photo_urls = []
@@ -47,8 +57,8 @@ async def save_uploaded_photos(files: list[UploadFile], pickup_request_id: int)
         with open(filepath, "wb") as f:
             f.write(content)
         
-        # Store relative URL (you may want to use absolute URLs in production)
-        photo_urls.append(f"/{UPLOAD_DIR}/{filename}")
+        # Store relative URL, or an absolute one when media is served from MEDIA_BASE_URL
+        photo_urls.append(f"{settings.MEDIA_BASE_URL.rstrip('/')}/{UPLOAD_DIR}/{filename}")
     
     return photo_urls
 
@@ -192,7 +202,7 @@ async def create_pickup_request(
     # Resolve brand_id from brand_name if provided
     resolved_brand_id = brand_id
     if not resolved_brand_id and brand_name:
-        brand = session.exec(select(Brand).where(Brand.name == brand_name)).first()
+        brand = (await session.exec(select(Brand).where(Brand.name == brand_name))).first()
         if brand:
             resolved_brand_id = brand.id
         else:
@@ -213,7 +223,7 @@ async def create_pickup_request(
     if address_json:
         if isinstance(address_json, str):
             try:
-                parsed_address = json.loads(address_json)
+                parsed_address = orjson.loads(address_json)
             except:
                 # If parsing fails, treat as plain address string
                 parsed_address = {"address": address_json}
@@ -249,8 +259,7 @@ async def create_pickup_request(
         estimated_price=estimated_price,
     )
     session.add(pr)
-    session.commit()
-    session.refresh(pr)
+    await session.commit()
     
     # Handle photo uploads
     photo_urls = []
@@ -260,8 +269,7 @@ async def create_pickup_request(
             # photos_json is now a List[str] type, no need for json.dumps()
             pr.photos_json = photo_urls
             session.add(pr)
-            session.commit()
-            session.refresh(pr)
+            await session.commit()
     
     return {
         "id": pr.id,
@@ -279,23 +287,19 @@ async def create_pickup_request(
 
 
 @router.post("/estimate", status_code=status.HTTP_200_OK)
-def get_tradein_estimate(
-    deviceData: dict = Body(...),
-    session=Depends(get_session),
-):
+async def get_tradein_estimate(deviceData: EstimatePayload = Body(...)):
     """Get trade-in estimate (compatible endpoint for frontend)."""
     # Extract device data
-    if not deviceData:
+    if not deviceData.model_fields_set:
         return {
             "success": False,
             "error": "Device data is required"
         }
     
-    brand_name = deviceData.get("brand")
-    model_text = deviceData.get("model")
-    storage = deviceData.get("storage")
-    condition = deviceData.get("condition")
-    notes = deviceData.get("notes")
+    brand_name = deviceData.brand
+    model_text = deviceData.model
+    storage = deviceData.storage
+    condition = deviceData.condition
     
     if not brand_name or not model_text or not condition:
         return {
@@ -336,22 +340,25 @@ def get_tradein_estimate(
 
 
 @router.get("/pickup-requests/me")
-def list_my_pickups(
+async def list_my_pickups(
     current_user: User = Depends(get_current_user),
     session=Depends(get_session),
 ):
     """Get current user's pickup requests."""
-    # LEFT OUTER JOIN evaluations so we can show final_offer/notes if available
+    # LEFT OUTER JOIN evaluations so we can show final_offer/notes if available,
+    # and brands so the brand name comes back in the same query
     stmt = (
-        select(PickupRequest, Evaluation)
+        select(PickupRequest, Evaluation, Brand)
         .where(PickupRequest.user_id == current_user.id)
         .join(Evaluation, Evaluation.pickup_id == PickupRequest.id, isouter=True)
+        .join(Brand, Brand.id == PickupRequest.brand_id, isouter=True)
+        # Evaluation details are not part of this listing
+        .options(defer(Evaluation.diagnostics_json), defer(Evaluation.parts_replaced_json))
     )
-    rows = session.exec(stmt).all()
+    rows = (await session.exec(stmt)).all()
 
     result = []
-    for req, ev in rows:
-        brand = session.get(Brand, req.brand_id) if req.brand_id else None
+    for req, ev, brand in rows:
         photos = req.photos_json if req.photos_json else []
 
         evaluation_data = (
@@ -389,20 +396,20 @@ def list_my_pickups(
 
 
 @router.get("/brands")
-def list_brands(session=Depends(get_session)):
+async def list_brands(session=Depends(get_session)):
     """Get list of available brands for trade-in."""
-    brands = session.exec(select(Brand)).all()
+    brands = (await session.exec(select(Brand))).all()
     return [{"id": brand.id, "name": brand.name} for brand in brands]
 
 
 @router.post("/pickup-requests/{pickup_id}/respond")
-def respond_to_offer(
+async def respond_to_offer(
     pickup_id: int,
     payload: RespondPayload,
     current_user: User = Depends(get_current_user),
     session=Depends(get_session),
 ):
-    pr = session.get(PickupRequest, pickup_id)
+    pr = await session.get(PickupRequest, pickup_id)
     if not pr or pr.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pickup request not found")
 
@@ -412,8 +419,7 @@ def respond_to_offer(
 
     pr.status = "accepted" if action == "accept" else "rejected"
     session.add(pr)
-    session.commit()
-    session.refresh(pr)
+    await session.commit()
     return pr
 
 
@@ -0,0 +1,90 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, Any
+from datetime import datetime
+
+
+class AdminUserSummary(BaseModel):
+    """Customer fields shown next to admin order and trade-in rows."""
+
+    id: int
+    email: str
+    full_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AdminOrderSummary(BaseModel):
+    """Order fields shown in the admin order list."""
+
+    id: int
+    user_id: int
+    status: str
+    subtotal: float
+    tax: float
+    shipping_fee: float
+    total: float
+    notes: Optional[str] = None
+    shipping_address_json: Any = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AdminOrderRow(BaseModel):
+    """One row of the admin order list (order joined with its customer)."""
+
+    order: AdminOrderSummary
+    user: AdminUserSummary
+
+
+class AdminPickupSummary(BaseModel):
+    """Pickup request fields shown in the admin trade-in list."""
+
+    id: int
+    user_id: int
+    brand_id: Optional[int] = None
+    model_text: Optional[str] = None
+    storage: Optional[str] = None
+    condition: Optional[str] = None
+    additional_info: Optional[str] = None
+    photos: Any = Field(default=None, validation_alias="photos_json")
+    address_json: Any = None
+    created_at: Optional[datetime] = None
+    scheduled_at: Optional[datetime] = None
+    deposit_amount: Optional[float] = None
+    status: Optional[str] = None
+    notes: Optional[str] = None
+    estimated_price: Optional[float] = None
+
+    @field_validator("photos", mode="before")
+    @classmethod
+    def default_photos(cls, v: Any) -> Any:
+        """Show pickups without photos as an empty list."""
+        return v or []
+
+    class Config:
+        from_attributes = True
+
+
+class AdminEvaluationSummary(BaseModel):
+    """Evaluation fields shown in the admin trade-in list."""
+
+    id: int
+    pickup_id: int
+    tester_id: Optional[int] = None
+    final_offer: Optional[float] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AdminTradeinRow(BaseModel):
+    """One row of the admin trade-in list (pickup, customer and evaluation if any)."""
+
+    pickup: AdminPickupSummary
+    user: AdminUserSummary
+    evaluation: Optional[AdminEvaluationSummary] = None
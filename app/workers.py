@@ -0,0 +1,16 @@
+from uvicorn.workers import UvicornWorker
+
+
+class RevoUvicornWorker(UvicornWorker):
+    """Gunicorn worker that pins uvloop and httptools (both ship with uvicorn[standard]).
+    
+    The stock worker uses "auto" and silently falls back to the pure-Python
+    asyncio loop and h11 parser if either is missing; pinning makes that a
+    startup error instead. limit_concurrency sheds load with a 503 rather
+    than queueing without bound.
+    """
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "limit_concurrency": 1000,
+    }
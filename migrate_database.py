@@ -5,6 +5,16 @@ This script adds the new columns that were added to the User and Order models:
 - users.full_name
 - users.phone_number
 - orders.shipping_address_json
+- order_items.image_snapshot (backfilled from the product's first image)
+
+It also creates indexes that create_all() only adds for brand-new tables
+(and drops the unused ix_users_email_lower):
+- foreign-key and composite indexes on hot join/filter columns
+- ix_addresses_user_default_created (list_addresses ordering)
+- payments_stripe_pi_key (unique PaymentIntent id for webhook upserts)
+- ix_products_category_condition and ix_products_price (product filters)
+
+and converts existing JSON columns to JSONB (unwrapping values stored as JSON strings).
 
 Run this script once to update your database schema.
 """
@@ -19,7 +29,7 @@ def migrate_database():
     
     database_url = os.getenv("DATABASE_URL", settings.DATABASE_URL)
     if database_url.startswith("postgresql://"):
-        database_url = database_url.replace("postgresql://", "postgresql+psycopg2://", 1)
+        database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
     
     print("Starting database migration...")
     
@@ -84,6 +94,143 @@ def migrate_database():
                     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
                 );
                 """,
+                
+                # Users are resolved by id or exact email (unique index), so the old
+                # case-insensitive lookup index is no longer used
+                """
+                DROP INDEX IF EXISTS ix_users_email_lower;
+                """,
+                
+                # Foreign-key and composite indexes on hot join/filter columns
+                """
+                CREATE INDEX IF NOT EXISTS ix_addresses_user_id ON addresses (user_id);
+                CREATE INDEX IF NOT EXISTS ix_products_brand_cat ON products (brand_id, category_id);
+                CREATE INDEX IF NOT EXISTS ix_products_category_id ON products (category_id);
+                CREATE INDEX IF NOT EXISTS ix_cart_items_product_id ON cart_items (product_id);
+                CREATE INDEX IF NOT EXISTS ix_orders_user_status ON orders (user_id, status);
+                CREATE INDEX IF NOT EXISTS ix_order_items_product_id ON order_items (product_id);
+                CREATE INDEX IF NOT EXISTS ix_payments_order_id ON payments (order_id);
+                CREATE INDEX IF NOT EXISTS ix_pickup_requests_user_id ON pickup_requests (user_id);
+                CREATE INDEX IF NOT EXISTS ix_pickup_requests_brand_id ON pickup_requests (brand_id);
+                CREATE INDEX IF NOT EXISTS ix_evaluations_pickup_id ON evaluations (pickup_id);
+                CREATE INDEX IF NOT EXISTS ix_evaluations_tester_id ON evaluations (tester_id);
+                CREATE INDEX IF NOT EXISTS ix_audit_logs_user_id ON audit_logs (user_id);
+                """,
+                
+                # Store pickup_requests.created_at as TIMESTAMPTZ like every other table
+                """
+                DO $$
+                BEGIN
+                    IF EXISTS (
+                        SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'pickup_requests' AND column_name = 'created_at'
+                          AND data_type = 'timestamp without time zone'
+                    ) THEN
+                        ALTER TABLE pickup_requests
+                            ALTER COLUMN created_at TYPE TIMESTAMP WITH TIME ZONE
+                            USING created_at AT TIME ZONE 'UTC';
+                    END IF;
+                    ALTER TABLE pickup_requests ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP;
+                END $$;
+                """,
+                
+                # created_at indexes for newest-first listings
+                """
+                CREATE INDEX IF NOT EXISTS ix_orders_created_at ON orders (created_at);
+                CREATE INDEX IF NOT EXISTS ix_pickup_requests_created_at ON pickup_requests (created_at);
+                CREATE INDEX IF NOT EXISTS ix_audit_logs_created_at ON audit_logs (created_at);
+                """,
+                
+                # Store every *_json column as JSONB
+                r"""
+                DO $$
+                DECLARE
+                    col RECORD;
+                BEGIN
+                    FOR col IN
+                        SELECT table_name, column_name FROM information_schema.columns
+                        WHERE table_schema = current_schema()
+                          AND data_type = 'json' AND column_name LIKE '%\_json'
+                    LOOP
+                        EXECUTE format(
+                            'ALTER TABLE %I ALTER COLUMN %I TYPE JSONB USING %I::jsonb',
+                            col.table_name, col.column_name, col.column_name
+                        );
+                    END LOOP;
+                END $$;
+                """,
+                
+                # GIN index for city availability containment filters
+                """
+                CREATE INDEX IF NOT EXISTS ix_products_city_gin ON products USING gin (city_availability_json);
+                """,
+                
+                # Index matching the list_addresses ORDER BY
+                """
+                CREATE INDEX IF NOT EXISTS ix_addresses_user_default_created
+                ON addresses (user_id, is_default DESC, created_at DESC NULLS LAST);
+                """,
+                
+                # Indexes matching the get_my_orders ORDER BY; they supersede ix_orders_user_status
+                """
+                CREATE INDEX IF NOT EXISTS ix_orders_user_created
+                ON orders (user_id, created_at DESC NULLS LAST, id DESC);
+                CREATE INDEX IF NOT EXISTS ix_orders_user_status_created
+                ON orders (user_id, status, created_at DESC NULLS LAST, id DESC);
+                DROP INDEX IF EXISTS ix_orders_user_status;
+                """,
+                
+                # PaymentIntent ids are unique; the webhook upserts payments on this key
+                """
+                CREATE UNIQUE INDEX IF NOT EXISTS payments_stripe_pi_key ON payments (stripe_pi);
+                """,
+                
+                # Unwrap JSON documents that were stored as JSON strings (legacy
+                # SQLite imports), so readers get lists/objects without re-parsing
+                r"""
+                DO $$
+                DECLARE
+                    col RECORD;
+                BEGIN
+                    FOR col IN
+                        SELECT table_name, column_name FROM information_schema.columns
+                        WHERE table_schema = current_schema()
+                          AND data_type = 'jsonb' AND column_name LIKE '%\_json'
+                    LOOP
+                        EXECUTE format(
+                            'UPDATE %I SET %I = (%I #>> ''{}'')::jsonb '
+                            'WHERE jsonb_typeof(%I) = ''string'' AND (%I #>> ''{}'') ~ ''^\s*[\[{]''',
+                            col.table_name, col.column_name, col.column_name, col.column_name, col.column_name
+                        );
+                    END LOOP;
+                END $$;
+                """,
+                
+                # Product filter indexes; the composite one supersedes ix_products_category_id,
+                # and the price expression must match PRODUCT_PRICE in app/db/models.py
+                """
+                CREATE INDEX IF NOT EXISTS ix_products_category_condition ON products (category_id, condition);
+                DROP INDEX IF EXISTS ix_products_category_id;
+                CREATE INDEX IF NOT EXISTS ix_products_price ON products
+                ((coalesce(nullif(resale_price, 0), nullif(list_price, 0), nullif(base_price, 0), 0)));
+                """,
+                
+                # Add image_snapshot to order_items and backfill it from products
+                """
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM information_schema.columns 
+                        WHERE table_name = 'order_items' AND column_name = 'image_snapshot'
+                    ) THEN
+                        ALTER TABLE order_items ADD COLUMN image_snapshot VARCHAR;
+                    END IF;
+                    UPDATE order_items oi SET image_snapshot = p.images_json ->> 0
+                    FROM products p
+                    WHERE p.id = oi.product_id AND oi.image_snapshot IS NULL
+                      AND jsonb_typeof(p.images_json -> 0) = 'string';
+                END $$;
+                """,
             ]
             
             for migration in migrations:
@@ -102,7 +249,16 @@ def migrate_database():
             print("  - users.full_name")
             print("  - users.phone_number")
             print("  - orders.shipping_address_json")
+            print("  - order_items.image_snapshot (backfilled)")
             print("  - addresses table (if it didn't exist)")
+            print("  - ix_users_email_lower index dropped")
+            print("  - foreign-key and composite indexes")
+            print("  - pickup_requests.created_at as TIMESTAMPTZ, created_at indexes")
+            print("  - *_json columns as JSONB, ix_products_city_gin index")
+            print("  - ix_addresses_user_default_created index")
+            print("  - string-encoded *_json values unwrapped to JSON documents")
+            print("  - payments_stripe_pi_key unique index")
+            print("  - ix_products_category_condition, ix_products_price indexes")
             
         except Exception as e:
             print(f"\n Migration error: {e}")
@@ -3,16 +3,16 @@ Seed database with sample data for testing.
 This script creates brands, categories, products, and test users.
 """
 from datetime import datetime
-from sqlmodel import select
+from sqlmodel import Session, select
 
-from app.db.database import get_session
+from app.db.database import engine
 from app.db.models import Brand, Category, Product, User
 from app.core.security import hash_password
 
 
 def seed_database():
     """Insert sample data into database."""
-    session = next(get_session())
+    session = Session(engine)
     
     try:
         # 1. Create Brands
@@ -4,12 +4,19 @@
 # Run database migrations (if needed)
 # python -m alembic upgrade head
 
-# Start the application with gunicorn
+# Handlers are async, so one worker per core keeps every core busy.
+# Override with WEB_CONCURRENCY; keep workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# below the database's max_connections (or use PgBouncer, see README).
+WORKERS=${WEB_CONCURRENCY:-$(nproc)}
+# The app splits its per-worker password hashing threads by this count
+export WEB_CONCURRENCY="$WORKERS"
+
+# Start the application with gunicorn (uvloop + httptools, see app/workers.py)
 gunicorn app.main:app \
-    --workers 4 \
-    --worker-class uvicorn.workers.UvicornWorker \
+    --workers "$WORKERS" \
+    --worker-class app.workers.RevoUvicornWorker \
     --bind 0.0.0.0:${PORT:-8000} \
+    --backlog 2048 \
     --timeout 120 \
     --access-logfile - \
     --error-logfile -
-